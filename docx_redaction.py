@@ -1,95 +1,65 @@
-# docx_redaction_lxml.py
-import os, re, zipfile, shutil, logging
+# docx_redaction.py (lxml 기반, 단일 구현)
+import os, re, logging
 from lxml import etree as LET
 
-# RULES 임포트 (패키지/스크립트 양쪽 지원)
+# 공통 매칭 엔진 임포트 (패키지/스크립트 양쪽 지원)
 try:
-    from .redac_rules import RULES
+    from .redac_core import (
+        get_logger, iter_batch_matches, iter_rule_matches, mask_nodes, mask_table,
+        merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 except ImportError:
-    from redac_rules import RULES
+    from redac_core import (
+        get_logger, iter_batch_matches, iter_rule_matches, mask_nodes, mask_table,
+        merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 
-logger = logging.getLogger("docx_redaction")
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
-    logger.addHandler(ch)
+logger = get_logger("docx_redaction")
 
 W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 NS = {"w": W_NS}
 XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
 
+# 미리 컴파일한 XPath (호출마다 식/네임스페이스 맵을 다시 파싱하지 않도록)
+_XP_P = LET.XPath(".//w:p", namespaces=NS)
+_XP_RT = LET.XPath(".//w:r/w:t", namespaces=NS)
+_XP_NESTED_P = LET.XPath("boolean(.//w:p//w:p)", namespaces=NS)
+
+# 바이트 사전 검사: <w:t> 요소(접두어 무관)가 없는 파트(빈 머리글 등)는 파싱하지 않음
+_T_BYTES_RE = re.compile(rb"<(?:[^\s<>/!?:]+:)?t[\s/>]")
+
 # 모든 하이픈/대시(보존 대상)
 KEEP = set("-\u2010\u2011\u2012\u2013\u2014\u2015\u2212")
 
-def _iter_doc_parts(tmp_dir: str):
-    word = os.path.join(tmp_dir, "word")
-    if not os.path.isdir(word):
-        return
-    def _y(name):
-        p = os.path.join(word, name)
-        if os.path.exists(p):
-            yield p
-    # 본문
-    yield from _y("document.xml")
-    # 머리글/바닥글
-    for fn in sorted(os.listdir(word)):
-        if fn.startswith("header") and fn.endswith(".xml"):
-            yield os.path.join(word, fn)
-        if fn.startswith("footer") and fn.endswith(".xml"):
-            yield os.path.join(word, fn)
-    # 코멘트/주석
-    yield from _y("comments.xml")
-    yield from _y("footnotes.xml")
-    yield from _y("endnotes.xml")
+def _select_doc_parts(names):
+    """본문, 머리글/바닥글, 코멘트/주석 파트 (word/ 바로 아래)"""
+    singles = {"word/document.xml", "word/comments.xml", "word/footnotes.xml", "word/endnotes.xml"}
+    for name in names:
+        if name in singles:
+            yield name
+        elif name.startswith("word/") and name.endswith(".xml"):
+            fn = name[len("word/"):]
+            if "/" not in fn and (fn.startswith("header") or fn.startswith("footer")):
+                yield name
+
+def _has_text(_name: str, data: bytes) -> bool:
+    """풀/파서로 보내기 전 바이트 사전 검사 (False면 처리할 텍스트가 없는 파트)"""
+    return part_may_match(data, _T_BYTES_RE)
 
 def _collect_text_nodes_in_paragraph(p):
     nodes = []
-    for t in p.xpath(".//w:r/w:t", namespaces=NS):
+    for t in _XP_RT(p):
         txt = t.text if t.text is not None else ""
         nodes.append([t, txt])
     return nodes
 
-def _merge_overlaps(spans):
-    if not spans:
-        return []
-    spans.sort()
-    merged = [spans[0]]
-    for s, e in spans[1:]:
-        ps, pe = merged[-1]
-        if s <= pe:
-            merged[-1] = (ps, max(pe, e))
-        else:
-            merged.append((s, e))
-    return merged
-
-def _apply_replacements_to_nodes(nodes, spans, mask="*"):
-    mask_char = (mask or "*")[0]
-    # 전역 오프셋
-    offs, acc = [], 0
-    for _n, txt in nodes:
-        offs.append((acc, acc + len(txt)))
-        acc += len(txt)
-    # 치환
-    for s, e in spans:
-        i = 0
-        while i < len(nodes) and e > s:
-            node, txt = nodes[i]
-            ns, ne = offs[i]
-            if ne <= s:
-                i += 1
-                continue
-            if ns >= e:
-                break
-            ls = max(ns, s) - ns
-            le = max(0, min(ne, e) - ns)
-            if ls < le:
-                piece = txt[ls:le]
-                # 하이픈/공백 보존, 나머지는 마스킹
-                masked = "".join(ch if (ch in KEEP or ch.isspace()) else mask_char for ch in piece)
-                nodes[i][1] = txt[:ls] + masked + txt[le:]
-            i += 1
+def _is_kept(ch: str) -> bool:
+    """마스킹하지 않고 보존할 문자: 하이픈/대시/공백"""
+    return ch in KEEP or ch.isspace()
+
+def _apply_replacements_to_nodes(nodes, spans, table):
+    mask_nodes(nodes, spans, table)
+
     # XML 반영: 공백 보존, 빈 텍스트 방지(셀프클로징 방지)
     for node, new_text in nodes:
         if new_text == "":
@@ -99,80 +69,107 @@ def _apply_replacements_to_nodes(nodes, spans, mask="*"):
         node.text = new_text
 
 def _find_matches(text: str):
-    out = []
-    for pname, rule in RULES.items():
-        comp, validator = rule["regex"], rule["validator"]
-        for m in comp.finditer(text):
-            val = m.group(0)
-            try:
-                if validator(val):
-                    out.append((pname, (m.start(), m.end()), val))
-                    logger.debug("[MATCH] %s '%s' %s", pname, val, (m.start(), m.end()))
-            except Exception as e:
+    """RULES 탐지 + validator 통과 구간 (s, e)를 차례로 생성"""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for pname, validator, m in iter_rule_matches(text):
+        val = m.group(0)
+        try:
+            ok = validator(val)
+        except Exception as e:
+            if debug:
+                logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
+            continue
+        if ok:
+            if debug:
+                logger.debug("[MATCH] %s '%s' %s", pname, val, m.span())
+            yield m.span()
+
+def _find_matches_batch(texts):
+    """texts 각각의 통과 구간 리스트 [[(s, e), ...], ...] (전체를 한 번에 스캔)"""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    out = [[] for _ in texts]
+    for i, pname, validator, s, e, val in iter_batch_matches(texts):
+        try:
+            if validator(val):
+                out[i].append((s, e))
+                if debug:
+                    logger.debug("[MATCH] %s '%s' %s", pname, val, (s, e))
+        except Exception as e:
+            if debug:
                 logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
     return out
 
-def redact_docx(input_docx: str, output_docx: str, mask="*"):
-    tmp_dir = "docx_tmp"
-    if os.path.exists(tmp_dir):
-        shutil.rmtree(tmp_dir)
-    os.makedirs(tmp_dir)
-
-    with zipfile.ZipFile(input_docx, "r") as z:
-        z.extractall(tmp_dir)
-
+def _redact_paragraphs(root, table) -> int:
+    """
+    모든 w:p를 한 번에 스캔해 마스킹 → 구간 수.
+    글상자처럼 w:p 안에 w:p가 있으면 안쪽 문단은 바깥 문단이 마스킹한 텍스트를 보고
+    스캔해야 하므로 문단마다 수집/스캔/마스킹을 차례로 수행.
+    """
+    total = 0
+    if _XP_NESTED_P(root):
+        for p in _XP_P(root):
+            nodes = _collect_text_nodes_in_paragraph(p)
+            if not nodes:
+                continue
+            joined = "".join(txt for _, txt in nodes)
+            spans = merge_overlaps(list(_find_matches(joined)))
+            if not spans:
+                continue
+            _apply_replacements_to_nodes(nodes, spans, table)
+            total += len(spans)
+        return total
+
+    paragraphs = [nodes for nodes in map(_collect_text_nodes_in_paragraph, _XP_P(root)) if nodes]
+    texts = ["".join(txt for _, txt in nodes) for nodes in paragraphs]
+    for nodes, found in zip(paragraphs, _find_matches_batch(texts)):
+        if not found:
+            continue
+        spans = merge_overlaps(found)
+        _apply_replacements_to_nodes(nodes, spans, table)
+        total += len(spans)
+    return total
+
+def _process_one_xml(name: str, data: bytes, mask_char="*"):
+    """
+    파트 하나 파싱 → 문단별 마스킹 → 직렬화 (rewrite_zip 워커)
+    반환: (name, 변경된 XML bytes 또는 None, 구간 수)
+    """
+    table = mask_table(mask_char, _is_kept)  # 파트당 1회
     parser = LET.XMLParser(remove_blank_text=False, resolve_entities=False, strip_cdata=False)
-
     total = 0
-    for xml_path in _iter_doc_parts(tmp_dir):
-        try:
-            with open(xml_path, "rb") as f:
-                data = f.read()
-            root = LET.fromstring(data, parser=parser)
-            changed = False
-            for p in root.xpath(".//w:p", namespaces=NS):
-                nodes = _collect_text_nodes_in_paragraph(p)
-                if not nodes:
-                    continue
-                joined = "".join(txt for _, txt in nodes)
-                found = _find_matches(joined)
-                if not found:
-                    continue
-                spans = _merge_overlaps([span for _pn, span, _v in found])
-                _apply_replacements_to_nodes(nodes, spans, mask=mask)
-                changed = True
-                total += len(spans)
-            if changed:
-                xml_bytes = LET.tostring(
-                    root,
-                    xml_declaration=True,
-                    encoding="UTF-8",
-                    standalone=None,    # 원본 선언 형태 유지
-                    pretty_print=False  # 공백/구조 보존
-                )
-                with open(xml_path, "wb") as f:
-                    f.write(xml_bytes)
-        except Exception as e:
-            logger.exception("Processing error in %s: %s", xml_path, e)
-
+    try:
+        root = LET.fromstring(data, parser=parser)
+        total = _redact_paragraphs(root, table)
+        if total:
+            # 원본 선언의 standalone="yes" 유지 (lxml은 생략과 "no"를 구분하지 않으므로 그 외는 생략 = 기본값 no)
+            standalone = True if root.getroottree().docinfo.standalone else None
+            xml_bytes = LET.tostring(
+                root,
+                xml_declaration=True,
+                encoding="UTF-8",
+                standalone=standalone,
+                pretty_print=False  # 공백/구조 보존
+            )
+            return name, xml_bytes, total
+    except Exception as e:
+        logger.exception("Processing error in %s: %s", name, e)
+    return name, None, 0
+
+def redact_docx(input_docx: str, output_docx: str, mask="*", executor=None):
+    mask_char = (mask or "*")[0]  # 문서당 1회 계산해 워커로 전달
+    # 압축 해제 없이 대상 파트만 처리하며 ZIP을 다시 씀 (루트구조 그대로, 출력 == 입력이어도 됨)
+    # executor: 배치 실행당 1회 만든 part_pool() (큰 문서만 파트를 풀로 분산)
+    try:
+        results = rewrite_zip(
+            input_docx, output_docx, _select_doc_parts, _process_one_xml, mask_char,
+            precheck=_has_text, executor=executor,
+        )
+    except PermissionError:
+        logger.error("Output is open. Close '%s' and run again.", output_docx)
+        raise
+
+    total = sum(spans for _name, _data, spans in results)
     logger.info("Total redacted ranges: %d", total)
-
-    # 안전 재압축(루트구조 그대로)
-    if os.path.exists(output_docx):
-        try:
-            os.remove(output_docx)
-        except PermissionError:
-            logger.error("Output is open. Close '%s' and run again.", output_docx)
-            raise
-
-    with zipfile.ZipFile(output_docx, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for folder, _dirs, files in os.walk(tmp_dir):
-            for f in files:
-                fp = os.path.join(folder, f)
-                arc = os.path.relpath(fp, tmp_dir).replace(os.sep, "/")
-                z.write(fp, arc)
-
-    shutil.rmtree(tmp_dir, ignore_errors=True)
     logger.info("[DONE] Saved: %s", output_docx)
 
 def _is_candidate(fname: str) -> bool:
@@ -181,9 +178,7 @@ def _is_candidate(fname: str) -> bool:
     if fname.startswith("~$"):
         return False  # Word 임시파일 제외
     base, _ = os.path.splitext(fname)
-    if base.lower().endswith("_redacted"):
-        return False
-    return os.path.isfile(fname)
+    return not base.lower().endswith("_redacted")
 
 if __name__ == "__main__":
     import sys
@@ -192,18 +187,22 @@ if __name__ == "__main__":
         # 단일 파일
         src = args[0]
         dst = args[1] if len(args) >= 2 else "output_redacted.docx"
-        redact_docx(src, dst, mask="*")
+        with part_pool() as pool:
+            redact_docx(src, dst, mask="*", executor=pool)
     else:
         # 배치: 현재 폴더의 모든 DOCX 처리
-        files = [f for f in os.listdir(".") if _is_candidate(f)]
+        # scandir: DirEntry.is_file()은 디렉터리 조회 결과를 재사용 (항목별 stat 없음)
+        with os.scandir(".") as it:
+            files = [e.name for e in it if e.is_file() and _is_candidate(e.name)]
         if not files:
             print("현재 폴더에 처리할 DOCX가 없습니다.")
             raise SystemExit(0)
-        for f in files:
-            base, ext = os.path.splitext(f)
-            out = f"{base}_redacted{ext}"
-            try:
-                print(f"[DOCX] {f} → {out}")
-                redact_docx(f, out, mask="*")
-            except Exception as e:
-                print(f"[ERROR] {f}: {e}")
+        with part_pool() as pool:  # 풀은 실행 전체에서 하나만
+            for f in files:
+                base, ext = os.path.splitext(f)
+                out = f"{base}_redacted{ext}"
+                try:
+                    print(f"[DOCX] {f} → {out}")
+                    redact_docx(f, out, mask="*", executor=pool)
+                except Exception as e:
+                    print(f"[ERROR] {f}: {e}")
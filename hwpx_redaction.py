@@ -1,24 +1,22 @@
 # hwpx_redaction.py
 import os
 import re
-import zipfile
-import shutil
 import logging
-import xml.etree.ElementTree as ET
+from lxml import etree as LET
 
-# RULES 불러오기 (패키지/스크립트 둘 다 지원)
+# 공통 매칭 엔진 (패키지/스크립트 둘 다 지원)
 try:
-    from .redac_rules import RULES
+    from .redac_core import (
+        get_logger, iter_batch_matches, mask_nodes, mask_table,
+        may_match, merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 except ImportError:
-    from redac_rules import RULES
+    from redac_core import (
+        get_logger, iter_batch_matches, mask_nodes, mask_table,
+        may_match, merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 
-logger = logging.getLogger("hwpx_redaction")
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
-    logger.addHandler(ch)
+logger = get_logger("hwpx_redaction")
 
 # 알려진 HWPX 네임스페이스 (방어적 대응)
 NS_LIST = [
@@ -31,188 +29,135 @@ NS_LIST = [
 # 하이픈/대시(보존 대상): - ‐ - ‒ – — ― −
 KEEP = set("-\u2010\u2011\u2012\u2013\u2014\u2015\u2212")
 
-def _local(tag: str) -> str:
-    """{ns}local 형태에서 local만 추출"""
-    return tag.split("}", 1)[1] if "}" in tag else tag
+# 네임스페이스 무관 태그 (lxml 와일드카드: 어떤 네임스페이스든/없어도 매칭, C 수준 필터)
+P_TAG = "{*}p"
+TEXT_TAGS = ("{*}t", "{*}text")
 
-def _iter_hwpx_xml_files(tmp_dir: str):
+# 바이트 사전 검사: <*t>/<*text> 요소가 없는 XML은 파싱하지 않음 (header.xml, settings 등)
+_TEXT_BYTES_RE = re.compile(rb"<(?:[^\s<>/!?:]+:)?(?:t|text)[\s/>]")
+
+def _select_hwpx_parts(names):
     """
     HWPX는 ZIP 내부 Contents/section*.xml 등에 텍스트가 존재.
-    안전하게 Contents/ 하위 모든 .xml 순회 (없으면 루트 폴더 폴백)
+    안전하게 Contents/ 하위 모든 .xml 선택 (없으면 전체 폴백)
     """
-    contents = os.path.join(tmp_dir, "Contents")
-    if not os.path.isdir(contents):
-        contents = tmp_dir
-    for root, _dirs, files in os.walk(contents):
-        for f in files:
-            if f.lower().endswith(".xml"):
-                yield os.path.join(root, f)
-
-def _collect_paragraph_nodes(tree: ET.ElementTree):
+    names = list(names)
+    prefix = "Contents/" if any(n.startswith("Contents/") for n in names) else ""
+    for name in names:
+        if name.startswith(prefix) and name.lower().endswith(".xml"):
+            yield name
+
+def _has_text(_name: str, data: bytes) -> bool:
+    """풀/파서로 보내기 전 바이트 사전 검사 (False면 처리할 텍스트가 없는 XML)"""
+    return part_may_match(data, _TEXT_BYTES_RE)
+
+def _collect_paragraph_nodes(root):
     """
     문단(<*p>) 단위로 텍스트 런(<*t>, <*text>) 수집.
     반환: 문단 리스트. 각 문단은 [ [node, text], ... ]
     """
-    root = tree.getroot()
     paragraphs = []
 
     # 문단 기준 수집
-    for p in root.iter():
-        if _local(p.tag) != "p":
-            continue
-        nodes = []
-        for el in p.iter():
-            lname = _local(el.tag)
-            if lname in ("t", "text") and el.text is not None:
-                nodes.append([el, el.text])
+    for p in root.iter(P_TAG):
+        nodes = [[el, el.text] for el in p.iter(*TEXT_TAGS) if el.text is not None]
         if nodes:
             paragraphs.append(nodes)
 
     # 문단이 전혀 없으면 파일 전체에서 t/text를 하나의 문단으로 간주(방어)
     if not paragraphs:
-        nodes = []
-        for el in root.iter():
-            lname = _local(el.tag)
-            if lname in ("t", "text") and el.text is not None:
-                nodes.append([el, el.text])
+        nodes = [[el, el.text] for el in root.iter(*TEXT_TAGS) if el.text is not None]
         if nodes:
             paragraphs.append(nodes)
 
     return paragraphs
 
-def _merge_overlaps(spans):
-    """겹치는 (s,e) 병합"""
-    if not spans:
-        return []
-    spans = sorted(spans)
-    merged = [spans[0]]
-    for s, e in spans[1:]:
-        ps, pe = merged[-1]
-        if s <= pe:
-            merged[-1] = (ps, max(pe, e))
-        else:
-            merged.append((s, e))
-    return merged
-
-def _apply_replacements_to_nodes(nodes, spans, mask="*"):
+def _is_kept(ch: str) -> bool:
+    """마스킹하지 않고 보존할 문자: 하이픈/대시/공백"""
+    return ch in KEEP or ch.isspace()
+
+def _apply_replacements_to_nodes(nodes, spans, table):
     """
     nodes: [[node, text], ...]
     spans: [(start, end)]   # 결합 문자열 기준
+    table: mask_table(mask_char, _is_kept)  # 호출자가 파트당 1회 구성
     정책: 매칭된 길이만큼 마스킹하되, 하이픈/대시는 보존.
     """
-    mask_char = (mask or "*")[0]
-
-    # 전역 오프셋
-    offsets = []
-    acc = 0
-    for _node, txt in nodes:
-        offsets.append((acc, acc + len(txt)))
-        acc += len(txt)
-
-    # 치환
-    for s, e in spans:
-        i = 0
-        while i < len(nodes) and e > s:
-            node, txt = nodes[i]
-            ns, ne = offsets[i]
-            if ne <= s:
-                i += 1
-                continue
-            if ns >= e:
-                break
-            ls = max(ns, s) - ns
-            le = max(0, min(ne, e) - ns)
-            if ls < le:
-                piece = txt[ls:le]
-                # 하이픈/대시/공백 보존, 나머지는 마스킹
-                masked = "".join(ch if (ch in KEEP or ch.isspace()) else mask_char for ch in piece)
-                nodes[i][1] = txt[:ls] + masked + txt[le:]
-            i += 1
+    mask_nodes(nodes, spans, table)
 
     # 반영
     for node, new_text in nodes:
         node.text = new_text
 
-def _find_matches(text: str):
-    """RULES로 search + validator → [(pname, (s,e), matched), ...]"""
-    matches = []
-    for pname, rule in RULES.items():
-        comp = rule["regex"]
-        validator = rule["validator"]
-        for m in comp.finditer(text):
-            val = m.group(0)
-            ok = False
-            try:
-                ok = bool(validator(val))
-            except Exception as e:
-                logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
-                ok = False
-            if ok:
-                matches.append((pname, (m.start(), m.end()), val))
-                logger.debug("[MATCH] %s '%s' span=%s", pname, val, (m.start(), m.end()))
-    return matches
-
-def _rezip_dir(src_dir: str, out_path: str):
-    """src_dir의 '내용'을 ZIP 루트에 그대로 담아 HWPX로 재압축"""
-    if os.path.exists(out_path):
-        os.remove(out_path)
-    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for root, _dirs, files in os.walk(src_dir):
-            for fname in files:
-                abs_path = os.path.join(root, fname)
-                arc = os.path.relpath(abs_path, src_dir).replace(os.sep, "/")
-                z.write(abs_path, arc)
-
-def redact_hwpx(input_hwpx: str, output_hwpx: str, mask="*"):
+def _validate(pname, validator, val) -> bool:
+    """validator 호출 (예외는 불일치로 간주)"""
+    try:
+        return bool(validator(val))
+    except Exception as e:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
+        return False
+
+def _find_matches_batch(texts):
+    """texts 각각의 통과 구간 리스트 [[(s, e), ...], ...] (전체를 한 번에 스캔)"""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    out = [[] for _ in texts]
+    for i, pname, validator, s, e, val in iter_batch_matches(texts):
+        if _validate(pname, validator, val):
+            out[i].append((s, e))
+            if debug:
+                logger.debug("[MATCH] %s '%s' span=%s", pname, val, (s, e))
+    return out
+
+def _process_one_xml(name: str, data: bytes, mask_char="*"):
+    """
+    XML 하나 파싱 → 문단별 마스킹 → 직렬화 (rewrite_zip 워커)
+    반환: (name, 변경된 XML bytes 또는 None, 구간 수)
+    """
+    table = mask_table(mask_char, _is_kept)  # 파트당 1회
+    parser = LET.XMLParser(remove_blank_text=False, resolve_entities=False, strip_cdata=False)
+    try:
+        root = LET.fromstring(data, parser=parser)
+    except LET.XMLSyntaxError:
+        return name, None, 0  # 이미지/미디어 등 무시
+
+    # 파일의 모든 문단을 한 번에 스캔 (수집이 마스킹보다 먼저라 중첩 문단도 기존과 동일)
+    # 사전 검사는 글자 하나 단위라 런별 결과로 충분 → 걸릴 런이 없는 문단은 결합조차 하지 않음
+    paragraphs = [
+        nodes for nodes in _collect_paragraph_nodes(root) if any(may_match(txt) for _, txt in nodes)
+    ]
+    texts = ["".join(txt for _, txt in nodes) for nodes in paragraphs]
+    total_spans = 0
+    for nodes, found in zip(paragraphs, _find_matches_batch(texts)):
+        if not found:
+            continue
+        spans = merge_overlaps(found)
+        _apply_replacements_to_nodes(nodes, spans, table)
+        total_spans += len(spans)
+
+    if not total_spans:
+        return name, None, 0
+    # 원본 선언의 standalone="yes" 유지 (lxml은 생략과 "no"를 구분하지 않으므로 그 외는 생략 = 기본값 no)
+    standalone = True if root.getroottree().docinfo.standalone else None
+    xml_bytes = LET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=standalone, pretty_print=False)
+    return name, xml_bytes, total_spans
+
+def redact_hwpx(input_hwpx: str, output_hwpx: str, mask="*", executor=None):
     """
     HWPX 레닥션:
       - Contents 폴더의 모든 XML에서 문단(<*p>) 탐색
       - 문단 내 텍스트 런(<*t>, <*text>)을 결합 → RULES로 후보 식별 → 길이 유지 마스킹(하이픈/대시 보존)
+    executor: 배치 실행당 1회 만든 part_pool() (큰 문서만 XML을 풀로 분산)
     """
-    tmp_dir = "hwpx_tmp"
-    if os.path.exists(tmp_dir):
-        shutil.rmtree(tmp_dir)
-    os.makedirs(tmp_dir)
-
-    # 1) 해제
-    with zipfile.ZipFile(input_hwpx, "r") as z:
-        z.extractall(tmp_dir)
-
-    total_spans = 0
-    changed_files = 0
-
-    # 2) XML 처리
-    for xml_path in _iter_hwpx_xml_files(tmp_dir):
-        try:
-            tree = ET.parse(xml_path)
-        except ET.ParseError:
-            continue  # 이미지/미디어 등 무시
-
-        paragraphs = _collect_paragraph_nodes(tree)
-        if not paragraphs:
-            continue
-
-        file_changed = False
-
-        for nodes in paragraphs:
-            joined = "".join(txt for _, txt in nodes)
-            found = _find_matches(joined)
-            if not found:
-                continue
-            spans = _merge_overlaps([span for _pn, span, _v in found])
-            _apply_replacements_to_nodes(nodes, spans, mask=mask)
-            total_spans += len(spans)
-            file_changed = True
-
-        if file_changed:
-            tree.write(xml_path, encoding="utf-8", xml_declaration=True)
-            changed_files += 1
-
-    logger.info("[HWPX] files changed=%d, total redacted groups=%d", changed_files, total_spans)
-
-    # 3) 안전 재압축(루트 구조 보존)
-    _rezip_dir(tmp_dir, output_hwpx)
-    shutil.rmtree(tmp_dir, ignore_errors=True)
+    mask_char = (mask or "*")[0]  # 문서당 1회 계산해 워커로 전달
+    # 압축 해제 없이 대상 XML만 처리하며 ZIP을 다시 씀 (엔트리 순서/루트 구조 보존, 출력 == 입력이어도 됨)
+    results = rewrite_zip(
+        input_hwpx, output_hwpx, _select_hwpx_parts, _process_one_xml, mask_char,
+        precheck=_has_text, executor=executor,
+    )
+
+    changed = [spans for _name, data, spans in results if data is not None]
+    logger.info("[HWPX] files changed=%d, total redacted groups=%d", len(changed), sum(changed))
     logger.info("[DONE] Saved: %s", output_hwpx)
 
 def _is_candidate(fname: str) -> bool:
@@ -220,9 +165,7 @@ def _is_candidate(fname: str) -> bool:
     if not fname.lower().endswith(".hwpx"):
         return False
     base, _ = os.path.splitext(fname)
-    if base.lower().endswith("_redacted"):
-        return False
-    return os.path.isfile(fname)
+    return not base.lower().endswith("_redacted")
 
 if __name__ == "__main__":
     import sys
@@ -231,18 +174,22 @@ if __name__ == "__main__":
         # 단일 파일
         src = args[0]
         dst = args[1] if len(args) >= 2 else "output_redacted.hwpx"
-        redact_hwpx(src, dst, mask="*")
+        with part_pool() as pool:
+            redact_hwpx(src, dst, mask="*", executor=pool)
     else:
         # 배치: 현재 폴더의 모든 .hwpx 처리
-        files = [f for f in os.listdir(".") if _is_candidate(f)]
+        # scandir: DirEntry.is_file()은 디렉터리 조회 결과를 재사용 (항목별 stat 없음)
+        with os.scandir(".") as it:
+            files = [e.name for e in it if e.is_file() and _is_candidate(e.name)]
         if not files:
             print("현재 폴더에 처리할 HWPX가 없습니다.")
             raise SystemExit(0)
-        for f in files:
-            base, ext = os.path.splitext(f)
-            out = f"{base}_redacted{ext}"
-            try:
-                print(f"[HWPX] {f} → {out}")
-                redact_hwpx(f, out, mask="*")
-            except Exception as e:
-                print(f"[ERROR] {f}: {e}")
+        with part_pool() as pool:  # 풀은 실행 전체에서 하나만
+            for f in files:
+                base, ext = os.path.splitext(f)
+                out = f"{base}_redacted{ext}"
+                try:
+                    print(f"[HWPX] {f} → {out}")
+                    redact_hwpx(f, out, mask="*", executor=pool)
+                except Exception as e:
+                    print(f"[ERROR] {f}: {e}")
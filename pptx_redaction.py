@@ -1,90 +1,57 @@
 # pptx_redaction.py
 import os
-import re
-import zipfile
-import shutil
 import logging
-import xml.etree.ElementTree as ET
+from lxml import etree as LET
 
-# RULES 임포트 (패키지/스크립트 양쪽 지원)
+# 공통 매칭 엔진 (패키지/스크립트 양쪽 지원)
 try:
-    from .redac_rules import RULES
+    from .redac_core import (
+        get_logger, iter_rule_matches, mask_nodes, mask_table, may_match, merge_overlaps, part_pool,
+        rewrite_zip,
+    )
 except ImportError:
-    from redac_rules import RULES
+    from redac_core import (
+        get_logger, iter_rule_matches, mask_nodes, mask_table, may_match, merge_overlaps, part_pool,
+        rewrite_zip,
+    )
 
-logger = logging.getLogger("pptx_redaction")
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
-    logger.addHandler(ch)
+logger = get_logger("pptx_redaction")
 
 NS = {"a": "http://schemas.openxmlformats.org/drawingml/2006/main"}
 
-def _iter_slides(tmp_dir: str):
-    slides_path = os.path.join(tmp_dir, "ppt", "slides")
-    if not os.path.isdir(slides_path):
-        return
-    for fname in sorted(os.listdir(slides_path)):
-        if fname.startswith("slide") and fname.endswith(".xml"):
-            yield os.path.join(slides_path, fname)
+# 미리 컴파일한 XPath (호출마다 식/네임스페이스 맵을 다시 파싱하지 않도록)
+_XP_P = LET.XPath(".//a:p", namespaces=NS)
+_XP_RT = LET.XPath(".//a:r/a:t", namespaces=NS)
+
+SLIDE_DIR = "ppt/slides/"
+
+def _select_slides(names):
+    """처리 대상 XML: ppt/slides/slide*.xml"""
+    for name in names:
+        if name.startswith(SLIDE_DIR):
+            fname = name[len(SLIDE_DIR):]
+            if "/" not in fname and fname.startswith("slide") and fname.endswith(".xml"):
+                yield name
 
 def _collect_text_nodes_in_paragraph(p):
     """<a:p> 안의 <a:t>들을 순서대로 수집 -> [[node, text], ...]"""
     nodes = []
-    for t in p.findall(".//a:r/a:t", NS):
+    for t in _XP_RT(p):
         nodes.append([t, t.text or ""])
     return nodes
 
-def _merge_overlaps(spans):
-    """겹치는 (s,e) 구간 병합"""
-    if not spans:
-        return []
-    spans = sorted(spans)
-    merged = [spans[0]]
-    for s, e in spans[1:]:
-        ps, pe = merged[-1]
-        if s <= pe:
-            merged[-1] = (ps, max(pe, e))
-        else:
-            merged.append((s, e))
-    return merged
-
-def _apply_replacements_to_nodes(nodes, spans, mask="*"):
+def _is_kept(ch: str) -> bool:
+    """마스킹하지 않고 보존할 문자: 하이픈('-')"""
+    return ch == "-"
+
+def _apply_replacements_to_nodes(nodes, spans, table):
     """
     nodes: [[node, text], ...]
     spans: [(start, end)]  # 결합 문자열 기준
+    table: mask_table(mask_char, _is_kept)  # 호출자가 슬라이드당 1회 구성
     하이픈('-')은 보존, 나머지는 mask로 동일 길이 치환
     """
-    mask_char = (mask or "*")[0]
-
-    # 전역 오프셋
-    offsets = []
-    acc = 0
-    for _node, txt in nodes:
-        offsets.append((acc, acc + len(txt)))
-        acc += len(txt)
-
-    # 각 span 치환
-    for s, e in spans:
-        i = 0
-        while i < len(nodes) and e > s:
-            node, txt = nodes[i]
-            ns, ne = offsets[i]
-            if ne <= s:
-                i += 1
-                continue
-            if ns >= e:
-                break
-
-            ls = max(ns, s) - ns
-            le = max(0, min(ne, e) - ns)
-            if ls < le:
-                piece = txt[ls:le]
-                masked = "".join(ch if ch == "-" else mask_char for ch in piece)
-                nodes[i][1] = txt[:ls] + masked + txt[le:]
-            i += 1
+    mask_nodes(nodes, spans, table)
 
     # XML 반영
     for node, new_text in nodes:
@@ -93,73 +60,62 @@ def _apply_replacements_to_nodes(nodes, spans, mask="*"):
 def _find_matches(text: str):
     """RULES로 search + validator. 반환: [(pname, (s,e), matched), ...]"""
     matches = []
-    for pname, rule in RULES.items():
-        comp = rule["regex"]
-        validator = rule["validator"]
-        for m in comp.finditer(text):
-            val = m.group(0)
-            ok = False
-            try:
-                ok = bool(validator(val))
-            except Exception as e:
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # 규칙 전체를 합친 정규식으로 한 번에 스캔 (m.lastgroup → 규칙/validator)
+    for pname, validator, m in iter_rule_matches(text):
+        val = m.group(0)
+        ok = False
+        try:
+            ok = bool(validator(val))
+        except Exception as e:
+            if debug:
                 logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
-                ok = False
-            if ok:
-                matches.append((pname, (m.start(), m.end()), val))
-                logger.debug("[MATCH] pattern=%s text='%s' span=%s", pname, val, (m.start(), m.end()))
+            ok = False
+        if ok:
+            matches.append((pname, m.span(), val))
+            if debug:
+                logger.debug("[MATCH] pattern=%s text='%s' span=%s", pname, val, m.span())
     return matches
 
-def _rezip_dir(src_dir: str, out_path: str):
-    """src_dir의 '내용'을 ZIP 루트에 그대로 담아 PPTX로 재압축"""
-    if os.path.exists(out_path):
-        os.remove(out_path)
-    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for root, _dirs, files in os.walk(src_dir):
-            for fname in files:
-                abs_path = os.path.join(root, fname)
-                arc = os.path.relpath(abs_path, src_dir).replace(os.sep, "/")
-                z.write(abs_path, arc)
-
-def redact_pptx(input_pptx: str, output_pptx: str, mask="*"):
-    # 1) temp 초기화
-    tmp_dir = "pptx_tmp"
-    if os.path.exists(tmp_dir):
-        shutil.rmtree(tmp_dir)
-    os.makedirs(tmp_dir)
-
-    # 2) 압축 해제
-    with zipfile.ZipFile(input_pptx, "r") as z:
-        z.extractall(tmp_dir)
-
-    # 3) 슬라이드 처리
+def _process_one_xml(name: str, data: bytes, mask_char="*"):
+    """
+    슬라이드 하나 파싱 → 문단별 마스킹 → 직렬화 (rewrite_zip 워커)
+    반환: (name, 변경된 XML bytes 또는 None, 구간 수)
+    """
+    table = mask_table(mask_char, _is_kept)  # 슬라이드당 1회
+    parser = LET.XMLParser(remove_blank_text=False, resolve_entities=False, strip_cdata=False)
+    root = LET.fromstring(data, parser=parser)
     total_spans = 0
-    for slide_path in _iter_slides(tmp_dir):
-        tree = ET.parse(slide_path)
-        root = tree.getroot()
-        changed = False
-
-        for p in root.findall(".//a:p", NS):
-            nodes = _collect_text_nodes_in_paragraph(p)
-            if not nodes:
-                continue
-            joined = "".join(txt for _, txt in nodes)
-            found = _find_matches(joined)
-            if not found:
-                continue
-
-            spans = _merge_overlaps([span for _pn, span, _v in found])
-            _apply_replacements_to_nodes(nodes, spans, mask=mask)
-            changed = True
-            total_spans += len(spans)
-
-        if changed:
-            tree.write(slide_path, encoding="utf-8", xml_declaration=True)
-
+    for p in _XP_P(root):
+        nodes = _collect_text_nodes_in_paragraph(p)
+        # 사전 검사는 글자 하나 단위라 런별 결과로 충분 → 걸릴 런이 없으면 결합/스캔 생략
+        if not any(may_match(txt) for _, txt in nodes):
+            continue
+        joined = "".join(txt for _, txt in nodes)
+        found = _find_matches(joined)
+        if not found:
+            continue
+
+        spans = merge_overlaps([span for _pn, span, _v in found])
+        _apply_replacements_to_nodes(nodes, spans, table)
+        total_spans += len(spans)
+
+    if not total_spans:
+        return name, None, 0
+    # 원본 선언의 standalone="yes" 유지 (lxml은 생략과 "no"를 구분하지 않으므로 그 외는 생략 = 기본값 no)
+    standalone = True if root.getroottree().docinfo.standalone else None
+    xml_bytes = LET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=standalone, pretty_print=False)
+    return name, xml_bytes, total_spans
+
+def redact_pptx(input_pptx: str, output_pptx: str, mask="*", executor=None):
+    mask_char = (mask or "*")[0]  # 문서당 1회 계산해 워커로 전달
+    # 압축 해제/임시 폴더 없이 슬라이드 XML만 처리하며 ZIP을 다시 씀 (출력 == 입력이어도 됨)
+    # (미디어 등 나머지 엔트리는 ZipInfo 그대로 복사)
+    # executor: 배치 실행당 1회 만든 part_pool() (큰 문서만 슬라이드를 풀로 분산)
+    results = rewrite_zip(input_pptx, output_pptx, _select_slides, _process_one_xml, mask_char, executor=executor)
+
+    total_spans = sum(spans for _name, _data, spans in results)
     logger.info("Total redacted ranges: %d", total_spans)
-
-    # 4) 안전 재압축
-    _rezip_dir(tmp_dir, output_pptx)
-    shutil.rmtree(tmp_dir, ignore_errors=True)
     logger.info("[DONE] Saved: %s", output_pptx)
 
 def _is_candidate(fname: str) -> bool:
@@ -169,9 +125,7 @@ def _is_candidate(fname: str) -> bool:
     if fname.startswith("~$"):  # PowerPoint 임시파일 제외
         return False
     base, _ = os.path.splitext(fname)
-    if base.lower().endswith("_redacted"):
-        return False
-    return os.path.isfile(fname)
+    return not base.lower().endswith("_redacted")
 
 if __name__ == "__main__":
     import sys
@@ -180,18 +134,22 @@ if __name__ == "__main__":
         # 단일 파일
         src = args[0]
         dst = args[1] if len(args) >= 2 else "output_redacted.pptx"
-        redact_pptx(src, dst, mask="*")
+        with part_pool() as pool:
+            redact_pptx(src, dst, mask="*", executor=pool)
     else:
         # 배치: 현재 폴더의 모든 .pptx 처리
-        files = [f for f in os.listdir(".") if _is_candidate(f)]
+        # scandir: DirEntry.is_file()은 디렉터리 조회 결과를 재사용 (항목별 stat 없음)
+        with os.scandir(".") as it:
+            files = [e.name for e in it if e.is_file() and _is_candidate(e.name)]
         if not files:
             print("현재 폴더에 처리할 PPTX가 없습니다.")
             raise SystemExit(0)
-        for f in files:
-            base, ext = os.path.splitext(f)
-            out = f"{base}_redacted{ext}"
-            try:
-                print(f"[PPTX] {f} → {out}")
-                redact_pptx(f, out, mask="*")
-            except Exception as e:
-                print(f"[ERROR] {f}: {e}")
+        with part_pool() as pool:  # 풀은 실행 전체에서 하나만
+            for f in files:
+                base, ext = os.path.splitext(f)
+                out = f"{base}_redacted{ext}"
+                try:
+                    print(f"[PPTX] {f} → {out}")
+                    redact_pptx(f, out, mask="*", executor=pool)
+                except Exception as e:
+                    print(f"[ERROR] {f}: {e}")
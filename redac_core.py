@@ -0,0 +1,661 @@
+# redac_core.py
+# 레닥션 모듈 공통 매칭 엔진 (xlsx/docx/hwpx/pptx 공용)
+import os
+import re
+import logging
+import zipfile
+import functools
+import contextlib
+import tempfile
+import shutil
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+# 정규식 파서 (3.11+ 는 re._parser)
+try:
+    from re import _parser as _sre_parse, _constants as _sre_c
+except ImportError:
+    import sre_parse as _sre_parse  # type: ignore
+    import sre_constants as _sre_c  # type: ignore
+
+# Hyperscan 게이트는 선택 의존성 (pip install hyperscan, x86-64 전용)
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# RULES 임포트 (패키지/스크립트 양쪽 지원)
+try:
+    from .redac_patterns import RULES
+except ImportError:
+    from redac_patterns import RULES
+
+# -----------------------------
+# 공통 로거
+# -----------------------------
+def get_logger(name: str):
+    """
+    레닥션 모듈 공통 로거: 기본 INFO (매칭 값 로그(DEBUG)는 필요할 때만 켬).
+    스트림 핸들러는 처음 한 번만 붙이고, DEBUG로 두어 logger.setLevel만으로 켤 수 있게 함.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setLevel(logging.DEBUG)
+        ch.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
+        logger.addHandler(ch)
+    return logger
+
+def _can_fuse(pname: str, comp) -> bool:
+    """하나의 alternation으로 합칠 수 있는 규칙인지 (그룹/플래그/빈 매칭 없음)"""
+    if not pname.isidentifier() or comp.groups:
+        return False
+    if comp.flags & ~re.UNICODE:
+        return False
+    try:
+        return _sre_parse.parse(comp.pattern, comp.flags).getwidth()[0] > 0
+    except Exception:
+        return False
+
+# -----------------------------
+# 문자 클래스 분석 (필수 문자 게이트 / 첫 글자 분기용)
+# -----------------------------
+MAX_GATE_SIZE = 32  # 이보다 넓은 클래스는 거의 항상 통과하므로 게이트로 쓰지 않음
+
+def _parse(comp):
+    """컴파일된 규칙 정규식의 파스 트리. IGNORECASE 등으로 분석 불가하면 None"""
+    if comp.flags & _sre_c.SRE_FLAG_IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(comp.pattern, comp.flags)
+    except Exception:
+        return None
+    if parsed.state.flags & _sre_c.SRE_FLAG_IGNORECASE:
+        return None
+    return parsed
+
+def _class_of(item):
+    """원소가 매칭되려면 반드시 하나는 있어야 하는 문자 토큰 집합. 판단 불가면 None"""
+    op, av = item
+    if op == _sre_c.LITERAL:
+        return frozenset({("c", av)})
+    if op == _sre_c.IN:
+        toks = set()
+        for sop, sav in av:
+            if sop == _sre_c.LITERAL:
+                toks.add(("c", sav))
+            elif sop == _sre_c.RANGE:
+                toks.add(("r", sav[0], sav[1]))
+            elif sop == _sre_c.CATEGORY and sav == _sre_c.CATEGORY_DIGIT:
+                toks.add(("d",))
+            else:
+                return None  # NEGATE / \w 등 넓은 카테고리
+        return frozenset(toks)
+    if op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT):
+        lo, _hi, sub = av
+        return _best_class(sub) if lo >= 1 else None
+    if op == _sre_c.SUBPATTERN:
+        if av[1] & _sre_c.SRE_FLAG_IGNORECASE:
+            return None
+        return _best_class(av[3])
+    if op == _sre_c.BRANCH:
+        out = set()
+        for alt in av[1]:
+            c = _best_class(alt)
+            if c is None:
+                return None
+            out |= c
+        return frozenset(out)
+    return None
+
+def _class_size(toks) -> int:
+    return sum(1 if t[0] == "c" else 10 if t[0] == "d" else t[2] - t[1] + 1 for t in toks)
+
+def _best_class(items):
+    """나열된 필수 원소 중 가장 좁은 문자 클래스"""
+    best = None
+    for item in items:
+        c = _class_of(item)
+        if c is not None and (best is None or _class_size(c) < _class_size(best)):
+            best = c
+    return best
+
+def _first_class(items):
+    """매칭 첫 글자가 속하는 문자 클래스 (폭 0 단언은 건너뜀). 판단 불가면 None"""
+    for item in items:
+        op, av = item
+        if op == _sre_c.AT:
+            continue
+        if op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT):
+            return _first_class(av[2]) if av[0] >= 1 else None
+        if op == _sre_c.SUBPATTERN:
+            return None if av[1] & _sre_c.SRE_FLAG_IGNORECASE else _first_class(av[3])
+        if op == _sre_c.BRANCH:
+            out = set()
+            for alt in av[1]:
+                c = _first_class(alt)
+                if c is None:
+                    return None
+                out |= c
+            return frozenset(out)
+        return _class_of(item)
+    return None
+
+def _render_class(toks):
+    """토큰 집합 → '[...]' 정규식 문자열"""
+    out = []
+    for t in sorted(toks):
+        if t[0] == "c":
+            out.append(re.escape(chr(t[1])))
+        elif t[0] == "d":
+            out.append(r"\d")  # 규칙의 \d 와 같은 유니코드 숫자 범위
+        else:
+            out.append(f"{re.escape(chr(t[1]))}-{re.escape(chr(t[2]))}")
+    return "[" + "".join(out) + "]"
+
+def _required_class(comp):
+    """
+    매칭 문자열에 반드시 포함되는 문자 클래스를 정규식 문자열로.
+    예) email → '[@]', rrn → '[\\d]', phone_mobile → '[0]'
+    """
+    parsed = _parse(comp)
+    best = _best_class(parsed) if parsed is not None else None
+    if best is None or _class_size(best) > MAX_GATE_SIZE:
+        return None
+    return _render_class(best)
+
+def _leading_class(comp):
+    """매칭 첫 글자 클래스의 정규식 문자열 (예: rrn → '[\\d]', passport → '[A-ZDGMORS]')"""
+    parsed = _parse(comp)
+    first = _first_class(parsed) if parsed is not None else None
+    return _render_class(first) if first else None
+
+# -----------------------------
+# 단일 alternation (FUSED)
+# -----------------------------
+_LEADING_CLASSES = {pname: _leading_class(rule["regex"]) for pname, rule in RULES.items()}
+
+def _compile_fused(names):
+    r"""
+    (?=[\d])(?:(?P<rrn>...)|(?P<fgn>...)|...)|(?=[@])(?:...) 형태의 단일 정규식.
+    첫 글자 클래스가 같은 규칙끼리 선행 lookahead로 묶어, 대부분의 위치에서는
+    분기마다 규칙 전부를 시도하지 않고 lookahead 하나로 넘어가게 한다.
+    반환: (정규식, 정규식 안의 규칙 순서). 불가하면 (None, ())
+    """
+    groups = {}
+    for n in names:
+        groups.setdefault(_LEADING_CLASSES[n], []).append(n)
+    parts, order = [], []
+    for cls, members in groups.items():
+        alts = "|".join(f"(?P<{n}>{RULES[n]['regex'].pattern})" for n in members)
+        parts.append(f"(?={cls})(?:{alts})" if cls else alts)
+        order.extend(members)
+    if not parts:
+        return None, ()
+    try:
+        return re.compile("|".join(parts)), tuple(order)
+    except re.error:
+        return None, ()
+
+# 임포트 시 1회 구성
+FUSED, _FUSED_NAMES = _compile_fused(
+    [pname for pname, rule in RULES.items() if _can_fuse(pname, rule["regex"])]
+)
+_UNFUSED_RULES = {pname: rule for pname, rule in RULES.items() if pname not in _FUSED_NAMES}
+
+# 규칙별 필수 문자 클래스 → 게이트 (같은 클래스는 하나로: rrn/fgn/card → [\d])
+_REQUIRED_CLASSES = {pname: _required_class(rule["regex"]) for pname, rule in RULES.items()}
+_GATE_CLASSES = tuple(sorted({c for c in _REQUIRED_CLASSES.values() if c}))
+_GATES = tuple(re.compile(c).search for c in _GATE_CLASSES)
+_RULE_GATE = {
+    pname: (_GATE_CLASSES.index(c) if c else None) for pname, c in _REQUIRED_CLASSES.items()
+}
+
+# 문단 사전 검사: 모든 규칙의 필수 문자 클래스 합집합 (예: '@', 숫자, 여권 첫 글자 …)
+# 이 중 한 글자도 없는 텍스트(일반 문장/제목 등)는 어떤 규칙과도 매칭될 수 없으므로 스캔 생략.
+# 필수 클래스가 없는 규칙이 하나라도 있으면 검사하지 않음 (None)
+_SCREEN = (
+    re.compile("[" + "".join(c[1:-1] for c in _GATE_CLASSES) + "]").search
+    if _GATE_CLASSES and all(_REQUIRED_CLASSES.values()) else None
+)
+
+def may_match(text: str) -> bool:
+    """text가 어떤 규칙과도 매칭될 수 없으면 False (정규식 엔진을 돌리지 않는 싼 검사)"""
+    return _SCREEN is None or _SCREEN(text) is not None
+
+@functools.lru_cache(maxsize=None)
+def _gate_active(gate_mask: int):
+    """게이트 통과 비트마스크 → 스캔할 규칙 이름 집합"""
+    return frozenset(
+        pname for pname, g in _RULE_GATE.items() if g is None or (gate_mask >> g) & 1
+    )
+
+def _gate_mask(text: str, gates) -> int:
+    """gates(인덱스)에 해당하는 필수 문자 클래스가 text에 있으면 그 비트를 세운 마스크"""
+    mask = 0
+    for i in gates:
+        if _GATES[i](text):
+            mask |= 1 << i
+    return mask
+
+# Hyperscan 게이트는 이보다 긴 텍스트(일괄 스캔으로 이어 붙인 파트 등)에만 사용.
+# 짧은 텍스트는 필수 문자 클래스 게이트로 충분하고 UTF-8 인코딩/콜백 비용이 더 큼
+HS_MIN_TEXT = 4096
+
+def _build_hs_database(rules):
+    r"""
+    규칙별 '매칭이 하나라도 있는가'만 판정하는 Hyperscan DB.
+    Hyperscan은 finditer와 매칭 의미(겹침/최좌측)가 달라 위치는 쓰지 않고 존재 여부만 본다.
+    (SINGLEMATCH + UTF8 + UCP: \d 등을 유니코드 기준으로 해석 → re와 같은 문자 집합)
+    플래그가 있는 패턴은 넣지 않고 필수 문자 클래스 게이트로 판정.
+    전체를 한 번에 컴파일하고, 실패하면(문법 미지원/빈 매칭 등) Hyperscan 없이 동작.
+    반환: (db, ids→pname 튜플, 제외된 규칙 이름 frozenset, 그 규칙들의 게이트). 불가하면 None
+    """
+    if hyperscan is None:
+        return None
+    names = tuple(pname for pname, rule in rules.items() if not rule["regex"].flags & ~re.UNICODE)
+    if not names:
+        return None
+    exprs = [rules[pname]["regex"].pattern.encode("utf-8") for pname in names]
+    flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    db = hyperscan.Database()
+    try:
+        db.compile(expressions=exprs, ids=list(range(len(exprs))), elements=len(exprs), flags=[flags] * len(exprs))
+    except Exception:
+        return None
+    ungated = frozenset(rules) - frozenset(names)
+    gates = tuple(sorted({_RULE_GATE[n] for n in ungated if _RULE_GATE[n] is not None}))
+    return db, names, ungated, gates
+
+@functools.lru_cache(maxsize=None)
+def _hs_database():
+    """Hyperscan DB는 처음 긴 텍스트를 볼 때 1회 컴파일 (임포트/워커 시작 시 비용 없음)"""
+    return _build_hs_database(RULES)
+
+def _hs_on_match(rid, _start, _end, _flags, hits):
+    hits.add(rid)
+
+def _active_rules(text: str):
+    """
+    text에서 매칭 가능성이 있는 규칙 이름 집합.
+    - 긴 텍스트이고 Hyperscan이 있으면 규칙별 존재 여부를 한 번의 스캔으로 판정
+      (DB에 못 넣은 규칙은 필수 문자 클래스 게이트로 판정)
+    - 그 외(또는 UTF-8로 인코딩 불가한 텍스트면) 전 규칙을 필수 문자 클래스 게이트로
+    """
+    hs = _hs_database() if hyperscan is not None and len(text) >= HS_MIN_TEXT else None
+    if hs is not None:
+        db, names, ungated, gates = hs
+        try:
+            data = text.encode("utf-8")
+        except UnicodeEncodeError:
+            data = None  # 짝 없는 서러게이트
+        if data is not None:
+            ids = set()
+            db.scan(data, match_event_handler=_hs_on_match, context=ids)
+            hits = {names[i] for i in ids}
+            if ungated:
+                hits |= _gate_active(_gate_mask(text, gates)) & ungated
+            return frozenset(hits)
+    return _gate_active(_gate_mask(text, range(len(_GATES))))
+
+@functools.lru_cache(maxsize=None)
+def _plan(active):
+    """
+    스캔할 규칙 이름 집합 → 그 규칙만으로 구성한
+    (fused, index, fused_list, unfused_list). 조합 수가 적어 전부 캐시한다.
+    핫패스용 튜플은 dict 조회/속성 참조 없이 고정:
+    fused_list는 (pname, finditer, validator, same, share),
+    unfused_list는 (pname, finditer, validator).
+    fused_list의 same: 같은 정규식을 앞서 쓰는 규칙의 fused 순서 (없으면 None),
+    share: 뒤에 같은 정규식을 쓰는 규칙이 있어 매칭 목록을 남겨야 하는지
+    """
+    fused, names = _compile_fused([n for n in RULES if n in active and n in _FUSED_NAMES])
+    index = {pname: i for i, pname in enumerate(names)}
+    first = {}  # (pattern, flags) → 그 정규식을 처음 쓰는 규칙의 fused 순서
+    same = []
+    for i, pname in enumerate(names):
+        comp = RULES[pname]["regex"]
+        j = first.setdefault((comp.pattern, comp.flags), i)
+        same.append(j if j != i else None)
+    fused_list = tuple(
+        (pname, RULES[pname]["regex"].finditer, RULES[pname]["validator"], same[i], i in same)
+        for i, pname in enumerate(names)
+    )
+    unfused_list = tuple(
+        (pname, rule["regex"].finditer, rule["validator"])
+        for pname, rule in _UNFUSED_RULES.items() if pname in active
+    )
+    return fused, index, fused_list, unfused_list
+
+def _iter_fused(text: str, fused, index, fused_list):
+    """
+    fused로 규칙별 finditer와 동일한 (pname, validator, match)를 생성.
+    - fused.search 한 번으로 '어떤 규칙이든 매칭되는' 첫 위치 p를 찾음 (없으면 종료)
+    - p 이전에는 어느 규칙도 매칭되지 않으므로 규칙별 스캔은 p부터 시작
+    - m.lastgroup 규칙은 m을 그대로 쓰고, fused 안에서 그보다 앞 순서의 규칙은 p에서 매칭 불가
+    - 정규식이 같은 규칙(rrn/fgn)은 앞 규칙의 매칭 목록을 그대로 재사용 (스캔 1회)
+    """
+    m = fused.search(text)
+    if m is None:
+        return
+    p = m.start()
+    k = index[m.lastgroup]
+    shared = {}
+    for i, (pname, finditer, validator, same, share) in enumerate(fused_list):
+        if same is not None:
+            for mm in shared[same]:
+                yield pname, validator, mm
+            continue
+        if i < k:
+            start = p + 1
+        elif i == k:
+            yield pname, validator, m
+            start = m.end()
+        else:
+            start = p
+        if share:
+            found = shared[i] = [m] if i == k else []
+            for mm in finditer(text, start):
+                found.append(mm)
+                yield pname, validator, mm
+        else:
+            for mm in finditer(text, start):
+                yield pname, validator, mm
+
+def _iter_unfused(text: str, unfused_list):
+    """FUSED에 합치지 못한 규칙(그룹/플래그 사용 등): 기존처럼 finditer로 전체 스캔"""
+    for pname, finditer, validator in unfused_list:
+        for m in finditer(text):
+            yield pname, validator, m
+
+def iter_rule_matches(text: str):
+    """
+    RULES 각각의 finditer(text)와 동일한 (pname, validator, match)를 생성.
+    - 매칭 가능성이 없는 규칙은 건너뜀 (Hyperscan 존재 판정 또는 필수 문자 클래스 게이트)
+    - 합칠 수 있는 규칙은 fused로 첫 후보 위치를 찾은 뒤 그 지점부터 스캔
+    - 나머지는 기존처럼 finditer로 전체 스캔
+    """
+    if not may_match(text):
+        return
+    fused, index, fused_list, unfused_list = _plan(_active_rules(text))
+    if fused is not None:
+        yield from _iter_fused(text, fused, index, fused_list)
+    if unfused_list:
+        yield from _iter_unfused(text, unfused_list)
+
+# -----------------------------
+# 여러 텍스트 일괄 스캔
+# -----------------------------
+SEP = "\x1e"  # 텍스트 사이 구분자 (정보 구분 문자 RS)
+
+_BOUNDARY_ATS = {
+    getattr(_sre_c, n) for n in (
+        "AT_BOUNDARY", "AT_NON_BOUNDARY",
+        "AT_UNI_BOUNDARY", "AT_UNI_NON_BOUNDARY",
+        "AT_LOC_BOUNDARY", "AT_LOC_NON_BOUNDARY",
+    ) if hasattr(_sre_c, n)
+}
+
+def _context_free(items) -> bool:
+    r"""
+    문자열 시작/끝을 보지 않고 앞뒤 문자를 엿보지 않는 패턴인지.
+    (^ $ \A \Z, lookaround, 역참조가 없으면 텍스트 끝 대신 구분자가 와도 결과가 같다.
+     \b 는 구분자가 비단어 문자라 텍스트 끝과 동일하게 동작)
+    """
+    for op, av in items:
+        if op == _sre_c.AT:
+            if av not in _BOUNDARY_ATS:
+                return False
+        elif op in (_sre_c.ASSERT, _sre_c.ASSERT_NOT):
+            return False
+        elif op.name.startswith("GROUPREF"):
+            return False
+        elif op == _sre_c.SUBPATTERN:
+            if not _context_free(av[-1]):
+                return False
+        elif op == _sre_c.BRANCH:
+            if not all(_context_free(alt) for alt in av[1]):
+                return False
+        elif op.name.endswith("REPEAT"):
+            if not _context_free(av[2]):
+                return False
+        elif op.name == "ATOMIC_GROUP":
+            if not _context_free(av):
+                return False
+    return True
+
+def _batch_safe(comp) -> bool:
+    try:
+        parsed = _sre_parse.parse(comp.pattern, comp.flags)
+    except Exception:
+        return False
+    return parsed.getwidth()[0] > 0 and _context_free(parsed)
+
+# 모든 규칙이 문맥 무관일 때만 결합 스캔 (아니면 텍스트별 스캔)
+BATCH_SAFE = all(_batch_safe(rule["regex"]) for rule in RULES.values())
+
+def iter_batch_matches(texts):
+    """
+    texts 각각에 iter_rule_matches를 돌린 것과 같은 (i, pname, validator, s, e, matched).
+    s/e는 texts[i] 기준 오프셋.
+    - 텍스트들을 SEP로 이어 한 번만 스캔하고, 매칭 시작 위치를 bisect로 원래 텍스트에 배정
+    - 매칭이 구분자를 넘으면 그 구간의 규칙 진행이 텍스트별 스캔과 달라질 수 있으므로
+      걸친 텍스트들만 따로 다시 스캔
+    - 사전 검사(may_match)에서 걸러진 텍스트는 결합 문자열에 넣지 않음
+    """
+    # 매칭 가능성이 있는 텍스트만 (원래 인덱스, 텍스트)로 남김
+    hot = [(i, text) for i, text in enumerate(texts) if may_match(text)]
+    if len(hot) <= 1 or not BATCH_SAFE or any(SEP in t for _i, t in hot):
+        for i, text in hot:
+            for pname, validator, m in iter_rule_matches(text):
+                yield i, pname, validator, m.start(), m.end(), m.group(0)
+        return
+
+    starts = []
+    acc = 0
+    for _i, text in hot:
+        starts.append(acc)
+        acc += len(text) + 1
+
+    found = []
+    redo = set()
+    for pname, validator, m in iter_rule_matches(SEP.join(t for _i, t in hot)):
+        s, e = m.span()
+        k = bisect_right(starts, s) - 1
+        if e - starts[k] > len(hot[k][1]):
+            redo.update(range(k, bisect_right(starts, e - 1)))
+            continue
+        found.append((hot[k][0], pname, validator, s - starts[k], e - starts[k], m.group(0)))
+
+    redo_ids = {hot[k][0] for k in redo}
+    for item in found:
+        if item[0] not in redo_ids:
+            yield item
+    for k in sorted(redo):
+        i, text = hot[k]
+        for pname, validator, m in iter_rule_matches(text):
+            yield i, pname, validator, m.start(), m.end(), m.group(0)
+
+# -----------------------------
+# 구간 병합 / 마스킹 (레닥션 모듈 공용)
+# -----------------------------
+def merge_sorted(spans):
+    """시작 위치순으로 정렬된 (s,e) 구간을 한 번 훑어 병합"""
+    if not spans:
+        return []
+    it = iter(spans)
+    ps, pe = next(it)
+    merged = []
+    for s, e in it:
+        if s <= pe:
+            if e > pe:
+                pe = e
+        else:
+            merged.append((ps, pe))
+            ps, pe = s, e
+    merged.append((ps, pe))
+    return merged
+
+def merge_overlaps(spans):
+    """겹치는 (s,e) 구간 병합 (spans 리스트는 제자리 정렬됨)"""
+    # spans는 규칙별로 이미 오름차순인 구간들의 연결 → list.sort(timsort)가 자연 run을
+    # C 수준에서 k-way 병합하므로 heapq.merge보다 빠르다
+    spans.sort()
+    return merge_sorted(spans)
+
+class _MaskTable(dict):
+    """str.translate용 지연 테이블: 처음 보는 코드포인트만 keep(ch)로 판정해 캐시"""
+    __slots__ = ("_mask", "_keep")
+
+    def __init__(self, mask_char: str, keep):
+        super().__init__()
+        self._mask = ord(mask_char)
+        self._keep = keep
+
+    def __missing__(self, cp):
+        v = cp if self._keep(chr(cp)) else self._mask
+        self[cp] = v
+        return v
+
+@functools.lru_cache(maxsize=None)
+def mask_table(mask_char: str, keep):
+    """
+    piece.translate(mask_table(mask_char, keep)) == "".join(ch if keep(ch) else mask_char for ch in piece)
+    keep은 모듈 수준 함수(해시 가능)여야 하며, (mask_char, keep)별로 테이블 하나를 계속 재사용.
+    """
+    return _MaskTable(mask_char, keep)
+
+def mask_spans(text: str, spans, table) -> str:
+    """정렬·병합된 spans 구간만 table로 변환하고 나머지는 그대로 이어 붙인 문자열"""
+    out = []
+    pos = 0
+    for s, e in spans:
+        out.append(text[pos:s])
+        out.append(text[s:e].translate(table))
+        pos = e
+    out.append(text[pos:])
+    return "".join(out)
+
+def mask_nodes(nodes, spans, table):
+    """
+    nodes: [[node, text], ...]   # 결합 순서대로의 텍스트 노드
+    spans: merge_overlaps 결과   # 결합 문자열 기준 (start 포함, end 제외)
+    각 노드의 text(nodes[i][1])만 길이 유지 마스킹으로 바꿈. XML 반영은 호출자 몫.
+    """
+    if len(nodes) == 1:
+        # 단일 노드(대부분의 셀/문단): 오프셋/bisect 없이 구간 사이 조각을 이어 붙임
+        nodes[0][1] = mask_spans(nodes[0][1], spans, table)
+        return
+
+    # 노드별 시작 오프셋 (결합 문자열 기준)
+    starts = []
+    acc = 0
+    for _node, txt in nodes:
+        starts.append(acc)
+        acc += len(txt)
+
+    # 각 span의 첫 노드는 bisect로 찾고, 문자 리스트에 인덱스 대입 (노드당 join 1회)
+    bufs = {}
+    n = len(nodes)
+    for s, e in spans:
+        i = bisect_right(starts, s) - 1
+        while i < n and starts[i] < e:
+            txt = nodes[i][1]
+            ls = max(s - starts[i], 0)
+            le = min(e - starts[i], len(txt))
+            if ls < le:
+                buf = bufs.get(i)
+                if buf is None:
+                    buf = bufs[i] = list(txt)
+                buf[ls:le] = txt[ls:le].translate(table)  # keep 문자 보존, 나머지 마스킹
+            i += 1
+    for i, buf in bufs.items():
+        nodes[i][1] = "".join(buf)
+
+# -----------------------------
+# XML 파트 병렬 처리
+# -----------------------------
+# 처리할 XML 합계가 이보다 작으면 풀로 보내는 비용(피클/IPC, spawn 시 워커 임포트)이 더 큼
+POOL_MIN_BYTES = 8 << 20
+
+def part_pool():
+    """
+    배치 실행 1회에 하나 만들어 redact_*(executor=...)로 넘기는 프로세스 풀 (with 문으로 사용).
+    워커는 처음 작업을 보낼 때 생기므로 큰 문서가 없으면 프로세스를 띄우지 않음. CPU가 1개면 None.
+    """
+    if (os.cpu_count() or 1) <= 1:
+        return contextlib.nullcontext()
+    return ProcessPoolExecutor()
+
+def map_parts(worker, items, *args, executor=None):
+    """
+    파트별로 독립인 worker(name, data, *args)를 실행, 입력 순서대로 결과 반환.
+    - 기본은 현재 프로세스에서 차례로 처리
+    - executor가 있고 파트가 2개 이상, 데이터 합계가 POOL_MIN_BYTES 이상일 때만 풀로 분산
+      (워커 프로세스는 이 모듈을 임포트하면서 RULES/FUSED를 각자 구성하므로 별도 initializer 불필요)
+    """
+    items = list(items)
+    if executor is None or len(items) < 2 or sum(len(data) for _name, data in items) < POOL_MIN_BYTES:
+        return [worker(*item, *args) for item in items]
+    cols = list(zip(*items)) + [[a] * len(items) for a in args]
+    return list(executor.map(worker, *cols))
+
+def part_may_match(data: bytes, pattern) -> bool:
+    """
+    파싱 전 바이트 사전 검사: pattern(bytes 정규식)이 없으면 처리할 텍스트가 없는 파트.
+    UTF-16/32 등 ASCII 비호환 인코딩은 판단하지 않고 True.
+    """
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff") or b"\x00" in data[:4]:
+        return True
+    return pattern.search(data) is not None
+
+# 이미 압축된 미디어: 다시 DEFLATE 해도 줄지 않으므로 STORED로 기록
+STORED_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".webp",
+               ".mp3", ".mp4", ".m4a", ".wav", ".avi", ".mov", ".wmv", ".zip")
+XML_COMPRESSLEVEL = 6
+
+def rewrite_zip(input_path: str, output_path: str, select_parts, worker, *args, precheck=None, executor=None):
+    """
+    압축 해제 없이 ZIP을 그대로 다시 쓰면서 select_parts(이름 목록)가 고른 파트만 worker로 처리.
+    - worker(name, data, *args) → (name, 변경된 bytes 또는 None, 구간 수)
+    - precheck(name, data)가 False인 파트는 worker로 보내지 않음 (결과는 (name, None, 0))
+    - executor: map_parts 참고 (큰 문서만 풀로 분산)
+    - 나머지 엔트리는 원본 순서/ZipInfo/압축 방식 그대로 복사 (미디어는 STORED)
+    - 변경된 XML은 DEFLATED(level 6)
+    - 출력은 같은 폴더의 임시 파일에 쓴 뒤 성공했을 때만 output_path로 교체
+      (output_path == input_path 여도 안전, 실패하면 임시 파일 삭제)
+    반환: 선택된 파트 순서대로의 worker 결과 리스트
+    """
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    tmp = tempfile.NamedTemporaryFile(dir=out_dir, prefix=".~redact-", suffix=".tmp", delete=False)
+    try:
+        with tmp, zipfile.ZipFile(input_path, "r") as zin:
+            infos = zin.infolist()
+            wanted = set(select_parts([info.filename for info in infos]))
+            parts = {info.filename: zin.read(info) for info in infos if info.filename in wanted}
+            todo = [(name, data) for name, data in parts.items() if precheck is None or precheck(name, data)]
+            done = {res[0]: res for res in map_parts(worker, todo, *args, executor=executor)}
+            results = [done.get(name, (name, None, 0)) for name in parts]
+            changed = {name: data for name, data, _n in results if data is not None}
+            with zipfile.ZipFile(tmp, "w") as zout:
+                for info in infos:
+                    name = info.filename
+                    if name in changed:
+                        zout.writestr(info, changed[name], zipfile.ZIP_DEFLATED, XML_COMPRESSLEVEL)
+                    elif name in parts:
+                        zout.writestr(info, parts[name])
+                    elif name.lower().endswith(STORED_EXTS):
+                        zout.writestr(info, zin.read(info), zipfile.ZIP_STORED)
+                    else:
+                        zout.writestr(info, zin.read(info))
+        # NamedTemporaryFile은 0600으로 만들어지므로 원본 권한을 따름
+        shutil.copymode(input_path, tmp.name)
+        os.replace(tmp.name, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+        raise
+    return results
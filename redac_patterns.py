@@ -0,0 +1,52 @@
+# server/redac_patterns.py
+# 개인정보 패턴/규칙의 단일 정의. 레닥션 모듈(redac_core)과 redac_rules_xml이 모두 여기서 가져간다.
+import re
+
+# validators 임포트: 패키지/스크립트 실행 모두 지원
+try:
+    from .validators_xml import (
+        is_valid_rrn, is_valid_fgn, is_valid_email, is_valid_phone_mobile,
+        is_valid_phone_city, is_valid_card, is_valid_driver_license,
+    )
+except Exception:
+    from validators_xml import (  # type: ignore
+        is_valid_rrn, is_valid_fgn, is_valid_email, is_valid_phone_mobile,
+        is_valid_phone_city, is_valid_card, is_valid_driver_license,
+    )
+
+# 기본 패턴들 (digits-only 매칭 후 validator로 2차 필터)
+RRN_RE = re.compile(r"\d{6}-?\d{7}")
+FGN_RE = re.compile(r"\d{6}-?\d{7}")
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}")
+MOBILE_RE = re.compile(r"01[016789]-?\d{3,4}-?\d{4}")
+CITY_RE = re.compile(r"(?:02|0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4]))-?\d{3,4}-?\d{4}")
+CARD_RE = re.compile(r"\d(?:[ -]*\d){12,18}")  # 숫자 13~19자리(공백/하이픈 구분)만 찾고 Luhn/IIN으로 거른다
+
+# 여권 (구/신여권 일부 패턴)
+PASSPORT_RE = re.compile(
+    r"(?:"
+    r"[A-Z]{2}\d{7}"             # 구여권: AB1234567
+    r"|"
+    r"(?:[MSRODG]\d{3}[A-Z]\d{4})"     # 신여권: M123A4567
+    r")"
+)
+
+# 지역코드 2자리 공통 접두를 묶어 대안마다 다시 매칭하지 않음 (대안 순서는 동일)
+DRIVER_LICENSE_RE = re.compile(
+    r"\d{2}(?:-\d{2}-(?:\d{6}-\d{2}|\d{7})|\d{10})"
+)
+
+# 마스킹 기본 설정
+DEFAULT_MASK = "*"
+
+# 패턴 테이블 (규칙 이름 → regex/validator/mask, 선언 순서 = 스캔 순서)
+RULES = {
+    "rrn": {"regex": RRN_RE, "validator": is_valid_rrn, "mask": "*"},
+    "fgn": {"regex": FGN_RE, "validator": is_valid_fgn, "mask": "*"},
+    "email": {"regex": EMAIL_RE, "validator": is_valid_email, "mask": "*"},
+    "phone_mobile": {"regex": MOBILE_RE, "validator": is_valid_phone_mobile, "mask": "*"},
+    "phone_city": {"regex": CITY_RE, "validator": is_valid_phone_city, "mask": "*"},
+    "card": {"regex": CARD_RE, "validator": is_valid_card, "mask": "*"},
+    "passport": {"regex": PASSPORT_RE, "validator": None, "mask": "*"},
+    "driver_license": {"regex": DRIVER_LICENSE_RE, "validator": is_valid_driver_license, "mask": "*"},
+}
@@ -0,0 +1,6 @@
+# tests/conftest.py
+# 플랫 모듈(redac_core, xlsx_redaction …)을 저장소 루트에서 바로 임포트
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+# tests/test_matching.py
+# iter_rule_matches / iter_batch_matches 가 규칙별 finditer 를 그대로 돌린 결과와 같은지 비교
+import random
+
+import pytest
+
+import redac_core
+from redac_core import RULES, SEP, iter_batch_matches, iter_rule_matches
+
+# 실제 문서에 나오는 조각들 (규칙 경계/유니코드 숫자/구분자 포함)
+PIECES = [
+    "900101-1234568", "8505055123451", "hong.gil@example.co.kr", "a@b.c", "010-1234-5678",
+    "01112345678", "02-123-4567", "031-1234-5678", "064 123 4567", "4111 1111 1111 1111",
+    "5500-0000-0000-0004", "M123A4567", "AB1234567", "11-22-333333-44", "12-34-1234567",
+    "１２３４５６-１２３４５６７", "٣٣٣٣٣٣٣٣٣٣٣٣٣", "안녕하세요 보고서입니다.", "Total 12 items",
+    "합계: 3,400원", "Tel: ", " ", "-", "@", ".", SEP,
+]
+ALPHABET = "0123456789" * 4 + "- -.@" + "abcXYZMSRGD" + "가나" + "０１９"
+
+
+def _random_text(rng: random.Random) -> str:
+    if rng.random() < 0.4:
+        return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(1, 6)))
+
+
+def _reference(text: str):
+    """규칙별 finditer 결과: {pname: [(s, e), ...]}"""
+    return {
+        pname: [m.span() for m in rule["regex"].finditer(text)]
+        for pname, rule in RULES.items()
+    }
+
+
+def _collect(matches):
+    out = {pname: [] for pname in RULES}
+    for pname, validator, m in matches:
+        assert validator is RULES[pname]["validator"]
+        out[pname].append(m.span())
+    return out
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_iter_rule_matches_equals_finditer(seed):
+    rng = random.Random(seed)
+    for _ in range(3000):
+        text = _random_text(rng)
+        assert _collect(iter_rule_matches(text)) == _reference(text), repr(text)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_iter_batch_matches_equals_finditer(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        texts = [_random_text(rng) for _ in range(rng.randint(0, 30))]
+        expected = sorted(
+            (i, pname, s, e, text[s:e])
+            for i, text in enumerate(texts)
+            for pname, spans in _reference(text).items()
+            for s, e in spans
+        )
+        got = []
+        for i, pname, validator, s, e, val in iter_batch_matches(texts):
+            assert validator is RULES[pname]["validator"]
+            got.append((i, pname, s, e, val))
+        assert sorted(got) == expected, texts
+
+
+@pytest.mark.parametrize("hs_min_text", [0, 10**9])
+def test_long_text_equals_finditer(monkeypatch, hs_min_text):
+    # 긴 텍스트(일괄 스캔으로 이어 붙인 파트 전체 등): Hyperscan 게이트(설치 시)와 문자 클래스 게이트 모두
+    monkeypatch.setattr(redac_core, "HS_MIN_TEXT", hs_min_text)
+    rng = random.Random(99)
+    for _ in range(20):
+        text = " ".join(_random_text(rng) for _ in range(400))
+        assert _collect(iter_rule_matches(text)) == _reference(text)
+
+
+def test_may_match_screen_is_safe():
+    # 사전 검사가 False면 어떤 규칙도 매칭되지 않아야 함
+    rng = random.Random(7)
+    for _ in range(5000):
+        text = _random_text(rng)
+        if not redac_core.may_match(text):
+            assert not any(_reference(text).values()), repr(text)
@@ -0,0 +1,199 @@
+# tests/test_redaction.py
+# 포맷별 레닥션 (작은 문서를 직접 만들어 redact_* 실행)
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import redac_core
+from docx_redaction import redact_docx
+from hwpx_redaction import redact_hwpx
+from pptx_redaction import redact_pptx
+from xlsx_redaction import redact_xlsx
+
+PHONE = "010-1234-5678"
+RRN = "900101-1234568"
+RRN_MASKED = "******-*******"
+MEDIA = bytes(range(256)) * 8
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+S_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+HP_NS = "http://www.hancom.co.kr/hwpml/2011/paragraph"
+DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+def _docx_parts():
+    # 런 경계에 걸친 전화번호 + 머리글의 주민번호
+    body = (
+        '<w:p><w:r><w:t xml:space="preserve">연락처 010-12</w:t></w:r>'
+        "<w:r><w:t>34-5678</w:t></w:r></w:p>"
+    )
+    return {
+        "word/document.xml": f'{DECL}<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>',
+        "word/header1.xml": f'{DECL}<w:hdr xmlns:w="{W_NS}"><w:p><w:r><w:t>{RRN}</w:t></w:r></w:p></w:hdr>',
+        "word/styles.xml": f'{DECL}<w:styles xmlns:w="{W_NS}"/>',
+        "word/media/image1.png": MEDIA,
+    }
+
+
+def _xlsx_parts():
+    sheet = (
+        f'<worksheet xmlns="{S_NS}"><sheetData><row r="1">'
+        f'<c r="A1" t="inlineStr"><is><t>{RRN}</t></is></c><c r="B1" t="s"><v>0</v></c>'
+        f"</row></sheetData></worksheet>"
+    )
+    return {
+        "xl/sharedStrings.xml": f'{DECL}<sst xmlns="{S_NS}"><si><r><t>연락처 </t></r><r><t>{PHONE}</t></r></si></sst>',
+        "xl/worksheets/sheet1.xml": DECL + sheet,
+        "xl/media/image1.png": MEDIA,
+    }
+
+
+def _pptx_parts():
+    slide = (
+        f'<p:sld xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" xmlns:a="{A_NS}">'
+        f"<a:p><a:r><a:t>연락처 {PHONE}</a:t></a:r></a:p><a:p><a:r><a:t>{RRN}</a:t></a:r></a:p></p:sld>"
+    )
+    return {"ppt/slides/slide1.xml": DECL + slide, "ppt/media/image1.png": MEDIA}
+
+
+def _hwpx_parts():
+    section = (
+        f'<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section" xmlns:hp="{HP_NS}">'
+        f"<hp:p><hp:run><hp:t>연락처 {PHONE}</hp:t></hp:run></hp:p>"
+        f"<hp:p><hp:run><hp:t>{RRN}</hp:t></hp:run></hp:p></hs:sec>"
+    )
+    return {
+        "mimetype": "application/hwp+zip",
+        "Contents/section0.xml": DECL + section,
+        "BinData/image1.png": MEDIA,
+    }
+
+
+# 포맷별 마스킹 후 텍스트 노드 (xlsx/pptx는 '-'만, docx/hwpx는 대시/공백 보존)
+EXPECTED_TEXTS = {
+    "docx": ["연락처 ***-**", "**-****", RRN_MASKED],
+    "xlsx": ["연락처 ", "***-****-****", RRN_MASKED],
+    "pptx": ["연락처 ***-****-****", RRN_MASKED],
+    "hwpx": ["연락처 ***-****-****", RRN_MASKED],
+}
+_TEXT_NODE_RE = re.compile(r"<(?:\w+:)?t(?:\s[^>]*)?>([^<]*)</")
+_STANDALONE_RE = re.compile(rb"<\?xml [^>]*standalone=['\"]yes['\"]")
+
+FORMATS = {
+    "docx": (_docx_parts, redact_docx),
+    "xlsx": (_xlsx_parts, redact_xlsx),
+    "pptx": (_pptx_parts, redact_pptx),
+    "hwpx": (_hwpx_parts, redact_hwpx),
+}
+
+
+def _write_zip(path, parts):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in parts.items():
+            z.writestr(name, data)
+
+
+def _read_zip(path):
+    with zipfile.ZipFile(path) as z:
+        return {info.filename: z.read(info) for info in z.infolist()}
+
+
+def _assert_redacted(before, after):
+    assert list(after) == list(before)  # 엔트리 순서 그대로
+    text = b"".join(data for name, data in after.items() if name.endswith(".xml")).decode("utf-8")
+    assert "010" not in text and "5678" not in text  # 런 경계에 걸친 전화번호 포함
+    assert RRN not in text
+    assert RRN_MASKED in text
+    for name, data in before.items():
+        if not name.endswith(".xml"):
+            assert after[name] == (data if isinstance(data, bytes) else data.encode("utf-8"))
+        else:
+            assert _STANDALONE_RE.match(after[name]), name  # 다시 쓴 파트도 선언 유지
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_redact_round_trip(tmp_path, fmt):
+    build, redact = FORMATS[fmt]
+    src, dst = tmp_path / f"in.{fmt}", tmp_path / f"out.{fmt}"
+    parts = build()
+    _write_zip(src, parts)
+    before = src.read_bytes()
+
+    redact(str(src), str(dst))
+
+    after = _read_zip(dst)
+    _assert_redacted(parts, after)
+    texts = [
+        t for name, data in after.items() if name.endswith(".xml")
+        for t in _TEXT_NODE_RE.findall(data.decode("utf-8"))
+    ]
+    assert texts == EXPECTED_TEXTS[fmt]
+    assert src.read_bytes() == before
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_redact_in_place(tmp_path, fmt):
+    build, redact = FORMATS[fmt]
+    path = tmp_path / f"doc.{fmt}"
+    parts = build()
+    _write_zip(path, parts)
+
+    redact(str(path), str(path))
+
+    _assert_redacted(parts, _read_zip(path))
+    assert os.listdir(tmp_path) == [path.name]  # 임시 파일이 남지 않음
+
+
+# 풀 경로 확인용: 파트가 하나뿐인 포맷은 같은 내용의 파트를 하나 더 둔다
+_SECOND_PART = {
+    "pptx": ("ppt/slides/slide1.xml", "ppt/slides/slide2.xml"),
+    "hwpx": ("Contents/section0.xml", "Contents/section1.xml"),
+}
+
+
+class _CountingPool(ProcessPoolExecutor):
+    """map 호출 횟수를 세는 풀 (작은 문서도 실제로 풀을 거쳤는지 확인)"""
+    calls = 0
+
+    def map(self, *args, **kwargs):
+        self.calls += 1
+        return super().map(*args, **kwargs)
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_pool_matches_serial(tmp_path, monkeypatch, fmt):
+    build, redact = FORMATS[fmt]
+    parts = build()
+    if fmt in _SECOND_PART:
+        src_name, dup_name = _SECOND_PART[fmt]
+        parts[dup_name] = parts[src_name]
+    src = tmp_path / f"in.{fmt}"
+    _write_zip(src, parts)
+
+    redact(str(src), str(tmp_path / f"serial.{fmt}"))
+    monkeypatch.setattr(redac_core, "POOL_MIN_BYTES", 0)
+    with _CountingPool(2) as pool:
+        redact(str(src), str(tmp_path / f"pool.{fmt}"), executor=pool)
+
+    assert pool.calls == 1
+    assert (tmp_path / f"pool.{fmt}").read_bytes() == (tmp_path / f"serial.{fmt}").read_bytes()
+    _assert_redacted(parts, _read_zip(tmp_path / f"pool.{fmt}"))
+
+
+def test_rewrite_zip_failure_keeps_input(tmp_path):
+    path = tmp_path / "doc.docx"
+    _write_zip(path, _docx_parts())
+    before = path.read_bytes()
+
+    def worker(_name, _data):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        redac_core.rewrite_zip(str(path), str(path), lambda names: names, worker)
+
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == [path.name]
@@ -0,0 +1,237 @@
+# tests/test_validators.py
+# validators_xml 의 최적화된 검증기를 원래의 단순한 구현(여기 보관)과 같은 결과인지 비교
+import random
+import re
+import time
+from datetime import datetime
+
+import pytest
+
+import validators_xml as v
+
+
+# -----------------------------
+# 기준 구현 (최적화 전 형태 그대로)
+# -----------------------------
+def ref_digits(s):
+    return re.sub(r"\D", "", s or "")
+
+
+def ref_luhn_ok(digits):
+    s = 0
+    for i, ch in enumerate(digits[::-1]):
+        n = ord(ch) - 48
+        if i % 2 == 1:
+            n *= 2
+            if n > 9:
+                n -= 9
+        s += n
+    return s % 10 == 0
+
+
+def ref_card(s):
+    d = ref_digits(s)
+    if not (13 <= len(d) <= 19) or not ref_luhn_ok(d):
+        return False
+    return any(d.startswith(p) for p in ("4", "5", "2", "34", "37", "6011", "65", "64", "622"))
+
+
+def ref_email(s):
+    return re.fullmatch(r"[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}", s or "") is not None
+
+
+def ref_mobile(s):
+    return re.fullmatch(r"01[016789]\d{7,8}", ref_digits(s)) is not None
+
+
+def ref_city(s):
+    d = ref_digits(s)
+    if re.fullmatch(r"02\d{7,8}", d):
+        return True
+    return re.fullmatch(r"0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4])\d{8}", d) is not None
+
+
+def ref_date6(s):
+    d = ref_digits(s)
+    if len(d) != 6:
+        return False
+    y, m, dd = int(d[:2]), int(d[2:4]), int(d[4:6])
+    this_year = int(datetime.today().strftime("%y"))
+    try:
+        datetime(1900 + y if y > this_year else 2000 + y, m, dd)
+        return True
+    except ValueError:
+        return False
+
+
+def _ref_checksum(s, offset):
+    d = ref_digits(s)
+    if len(d) != 13:
+        return False
+    total = sum(int(x) * w for x, w in zip(d[:-1], [2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5]))
+    return (11 - (total % 11) + offset) % 10 == int(d[-1])
+
+
+def ref_rrn(s):
+    d = ref_digits(s)
+    return len(d) == 13 and ref_date6(d[:6]) and _ref_checksum(d, 0)
+
+
+def ref_fgn(s):
+    d = ref_digits(s)
+    return len(d) == 13 and ref_date6(d[:6]) and _ref_checksum(d, 2)
+
+
+PAIRS = [
+    (v.is_valid_card, ref_card),
+    (v.is_valid_email, ref_email),
+    (v.is_valid_phone_mobile, ref_mobile),
+    (v.is_valid_phone_city, ref_city),
+    (v.is_valid_date6, ref_date6),
+    (v.is_valid_rrn, ref_rrn),
+    (v.is_valid_fgn, ref_fgn),
+    (v.is_valid_rrn_checksum, lambda s: _ref_checksum(s, 0)),
+    (v.is_valid_fgn_checksum, lambda s: _ref_checksum(s, 2)),
+    (v._digits, ref_digits),
+]
+
+# 숫자 표기: ASCII / 전각 / 아라비아-인도 숫자
+DIGIT_SETS = ["0123456789", "０１２３４５６７８９", "٠١٢٣٤٥٦٧٨٩"]
+
+
+def _to(digits, charset):
+    return "".join(charset[int(c)] for c in digits)
+
+
+def _with_check(body, fn):
+    """본문 뒤에 fn(본문+c)가 참이 되는 검증 숫자 c를 붙임 (없으면 0)"""
+    for c in "0123456789":
+        if fn(body + c):
+            return body + c
+    return body + "0"
+
+
+def _assert_same(values):
+    # lru_cache 래퍼: 비운 뒤 한 번(미적중), 다시 한 번(적중) 모두 기준과 같아야 함
+    for fn in (v.is_valid_card, v.is_valid_email, v.is_valid_phone_mobile,
+               v.is_valid_phone_city, v.is_valid_rrn, v.is_valid_fgn):
+        fn.cache_clear()
+    for _ in range(2):
+        for s in values:
+            for fn, ref in PAIRS:
+                assert fn(s) == ref(s), (fn.__name__, s)
+
+
+# -----------------------------
+# 경계 사례
+# -----------------------------
+def test_empty_and_short():
+    values = [None, "", "0", "01", "4", "-", " ", "a@b.c"]
+    values += ["01012345678"[:k] for k in range(12)]
+    values += ["4111111111111111"[:k] for k in range(17)]
+    values += ["9001011234568"[:k] for k in range(14)]
+    _assert_same(values)
+
+
+def test_card_iin_prefixes():
+    values = []
+    for prefix in ("4", "5", "2", "34", "37", "6011", "65", "64", "622", "3", "1", "60", "62", "0", "9"):
+        for n in range(12, 21):
+            body = (prefix + "1234567890123456789")[: n - 1]
+            full = _with_check(body, ref_luhn_ok)
+            for charset in DIGIT_SETS:
+                digits = _to(full, charset)
+                values += [digits, " ".join(digits[i:i + 4] for i in range(0, len(digits), 4))]
+            values.append(body + str((int(full[-1]) + 1) % 10))  # Luhn 실패
+    assert any(ref_card(s) for s in values)
+    _assert_same(values)
+
+
+def test_mobile_prefixes():
+    values = []
+    for prefix in ("010", "011", "016", "017", "018", "019", "012", "013", "014", "015", "020", "110"):
+        for n in (6, 7, 8, 9):
+            rest = "12345678901"[:n]
+            for charset in DIGIT_SETS:
+                values += [_to(prefix + rest, charset), f"{prefix}-{rest[:n - 4]}-{rest[n - 4:]}"]
+    assert any(ref_mobile(s) for s in values)
+    _assert_same(values)
+
+
+def test_every_city_code():
+    codes = ["02", "031", "032", "033", "041", "042", "043", "044", "051", "052", "053",
+             "054", "055", "061", "062", "063", "064"]
+    assert sorted(v._CITY_CODES) == codes[1:]
+    values = []
+    for code in codes + ["030", "034", "040", "045", "050", "056", "060", "065", "070", "01"]:
+        for n in (6, 7, 8, 9):
+            rest = "123456789"[:n]
+            for charset in DIGIT_SETS:
+                values += [_to(code + rest, charset), f"{code}-{rest[:n - 4]}-{rest[n - 4:]}"]
+    assert any(ref_city(s) for s in values)
+    _assert_same(values)
+
+
+def test_dates_and_leap_days():
+    # 모든 yyMMdd 중 월 00~13, 일 00~32 (2/29는 윤년/평년/2000년 포함)
+    values = [f"{y:02d}{m:02d}{d:02d}" for y in range(100) for m in range(14) for d in range(33)]
+    values += ["000229", "040229", "960229", "010229", "970229", "000230", "_00-02-29"]
+    _assert_same(values)
+
+
+def test_rrn_fgn_century_and_gender_digits():
+    # 현재 연도 경계(yy == 올해 → 20yy, 올해+1 → 19yy)와 성별 자리 0~9
+    this_year = datetime.today().year % 100
+    years = {0, 99, this_year, (this_year + 1) % 100, (this_year - 1) % 100}
+    values = []
+    for y in sorted(years):
+        for birth in (f"{y:02d}0229", f"{y:02d}1231", f"{y:02d}0101", f"{y:02d}0230"):
+            for gender in "0123456789":
+                body = birth + gender + "23456"
+                for check in (lambda s: _ref_checksum(s, 0), lambda s: _ref_checksum(s, 2)):
+                    full = _with_check(body, check)
+                    for charset in DIGIT_SETS:
+                        values += [_to(full, charset), _to(full[:6], charset) + "-" + _to(full[6:], charset)]
+    assert any(ref_rrn(s) for s in values) and any(ref_fgn(s) for s in values)
+    _assert_same(values)
+
+
+def test_email_prefilter():
+    values = [
+        "", "a@b.c", "@ab.cd", "ab@cdef", "ab@cd.", "a.b@cd", "a@b@c.de", "a@.bc.de", "a@b..cd",
+        "a@b.cd", "user.name+tag@example.co.kr", "x@y.zz", "가@b.cd", "a@b.c1", "a b@c.de",
+    ]
+    _assert_same(values)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_inputs(seed):
+    rng = random.Random(seed)
+    alphabet = "0123456789" * 6 + " -.@aZ_%+" + "٣۵０１" + "가"
+    prefixes = ["", "01", "010", "011", "02", "031", "064", "070", "4", "5", "2", "34", "37", "6011", "622", "90", "00"]
+    values = []
+    for _ in range(3000):
+        s = rng.choice(prefixes) + "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 22)))
+        values.append(s)
+    _assert_same(values)
+
+
+def test_weighted_sum():
+    rng = random.Random(1)
+    for _ in range(2000):
+        d = "".join(rng.choice("0123456789") for _ in range(13))
+        charset = rng.choice(DIGIT_SETS)
+        u = _to(d, charset)
+        expected = sum(int(x) * w for x, w in zip(d, (2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5)))
+        assert v._weighted_sum(u) == expected
+
+
+def test_this_year2_ttl(monkeypatch):
+    now = time.monotonic()
+    # TTL 안에서는 캐시 값을 그대로, 지나면 현재 연도로 갱신
+    monkeypatch.setattr(v, "_today_cache", (now, 42))
+    assert v._this_year2() == 42
+    monkeypatch.setattr(v, "_today_cache", (now - v._TODAY_TTL - 1, 42))
+    assert v._this_year2() == datetime.today().year % 100
+    monkeypatch.setattr(v, "_today_cache", None)
+    assert v._this_year2() == datetime.today().year % 100
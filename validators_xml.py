@@ -1,85 +1,161 @@
 # server/validators_xml.py
 import re
+import time
+import functools
 from datetime import datetime
 
+# 검증 결과 캐시 크기: 같은 후보(반복되는 번호/주소)가 문서 전반에 되풀이되므로 입력별로 기억
+_CACHE_SIZE = 4096
+
+# 미리 컴파일한 패턴 (호출마다 re 모듈 캐시를 조회하지 않도록)
+_NON_DIGIT_RE = re.compile(r"\D")
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}")
+
+# 휴대전화 식별번호
+_MOBILE_PREFIXES = ("010", "011", "016", "017", "018", "019")
+# 지역번호 (서울 02 제외): 031-033, 041-044, 051-055, 061-064
+_CITY_CODES = frozenset(
+    f"0{a}{b}" for a, last in ((3, 3), (4, 4), (5, 5), (6, 4)) for b in range(1, last + 1)
+)
+
+# ASCII 비숫자 바이트 (bytes.translate 삭제 목록)
+_NON_DIGIT_BYTES = bytes(c for c in range(128) if not 48 <= c <= 57)
+
 # 숫자만 추출
 def _digits(s: str) -> str:
-    return re.sub(r"\D", "", s or "")
+    if not s:
+        return ""
+    if s.isascii():
+        # ASCII(대부분): bytes.translate 삭제 모드로 C 수준 필터 (정규식 엔진 없음)
+        return s.encode().translate(None, _NON_DIGIT_BYTES).decode()
+    return _NON_DIGIT_RE.sub("", s)  # 유니코드 숫자(\d)도 그대로 보존
+
+# Luhn: 뒤에서 짝수 번째 자리는 두 배 후 자릿수 합 → 0,2,4,6,8,1,3,5,7,9
+_LUHN_DBL = bytes.maketrans(b"0123456789", b"0246813579")
 
 # Luhn 체크
 def _luhn_ok(digits: str) -> bool:
+    if digits.isascii() and digits.isdigit():
+        # ASCII 숫자열(대부분): 자리별 루프 대신 바이트 슬라이스 합 (C 수준)
+        b = digits.encode()
+        return (sum(b[-1::-2]) + sum(b[-2::-2].translate(_LUHN_DBL)) - 48 * len(b)) % 10 == 0
+    # 그 외(유니코드 숫자 등): 앞에서부터 순회, 두 배 자리는 길이의 홀짝으로 결정 (역순 복사 없음)
     s = 0
-    rev = digits[::-1]
-    for i, ch in enumerate(rev):
+    alt = len(digits) % 2 == 0
+    for ch in digits:
         n = ord(ch) - 48
-        if i % 2 == 1:
+        if alt:
             n *= 2
             if n > 9:
                 n -= 9
         s += n
+        alt = not alt
     return s % 10 == 0
 
+# IIN 대략 필터: 2-6 시작 (Master 51-55, 2221-2720 등), 4(Visa), 34/37(Amex), 6011/65/64x/622(Discover)
+_CARD_IIN = ("4", "5", "2", "34", "37", "6011", "65", "64", "622")
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_card(s: str) -> bool:
+    # 숫자 수는 입력 길이를 넘지 않음 → 13자 미만은 숫자 추출 없이 거절
+    if not s or len(s) < 13:
+        return False
     d = _digits(s)
-    # 길이 / IIN 간단 필터 (Visa/Master/Amex/Discover 포함)
+    # 길이 / IIN 간단 필터 (Visa/Master/Amex/Discover 포함) → 싼 검사부터, Luhn은 마지막
     if not (13 <= len(d) <= 19):
         return False
-    if not _luhn_ok(d):
-        return False
-    # IIN 대략 필터: 2-6 시작 (Master 51-55, 2221-2720 등), 4(Visa), 34/37(Amex), 6011/65/64x/622(Discover)
-    if not (
-        d.startswith("4") or
-        d.startswith("5") or
-        d.startswith("2") or
-        d.startswith("34") or d.startswith("37") or
-        d.startswith("6011") or d.startswith("65") or d.startswith("64") or d.startswith("622")
-    ):
+    # IIN 대략 필터: 접두어 튜플 하나로 startswith 1회 (C 수준에서 차례로 비교)
+    if not d.startswith(_CARD_IIN):
         return False
-    return True
+    return _luhn_ok(d)
 
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_email(s: str) -> bool:
-    return re.fullmatch(r"[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}", s or "") is not None
+    # 정규식 전에 싼 거절: 최소 형태 'a@b.cd'(6자), '@' 앞 한 글자 이상, '@' 뒤에 '.'
+    if not s or len(s) < 6:
+        return False
+    at = s.find("@")
+    if at < 1 or "." not in s[at + 1:]:
+        return False
+    return _EMAIL_RE.fullmatch(s) is not None
 
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_phone_mobile(s: str) -> bool:
     d = _digits(s)
-    # 010/011/016/017/018/019 + 7~8자리
-    return re.fullmatch(r"01[016789]\d{7,8}", d or "") is not None
+    # 010/011/016/017/018/019 + 7~8자리 (d는 숫자만 → 접두어 + 길이 비교로 충분)
+    return 10 <= len(d) <= 11 and d.startswith(_MOBILE_PREFIXES)
 
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_phone_city(s: str) -> bool:
     d = _digits(s)
-    # 02 + 7~8자리, 또는 0(3x~6x) + 8자리
-    if re.fullmatch(r"02\d{7,8}", d or ""):
-        return True
-    return re.fullmatch(r"0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4])\d{8}", d or "") is not None
+    # 02 + 7~8자리, 또는 0(3x~6x) + 8자리 (d는 숫자만 → 접두어 + 길이 비교로 충분)
+    if d.startswith("02"):
+        return 9 <= len(d) <= 10
+    return len(d) == 11 and d[:3] in _CITY_CODES
+
+# 현재 연도 캐시: (monotonic 시각, 연도 뒤 2자리). 배치 중에는 사실상 상수
+_TODAY_TTL = 60.0
+_today_cache = None
+
+def _this_year2() -> int:
+    """현재 연도 뒤 2자리 (60초 캐시 → 호출마다 datetime.today()/strftime 하지 않음)"""
+    global _today_cache
+    now = time.monotonic()
+    if _today_cache is None or now - _today_cache[0] >= _TODAY_TTL:
+        _today_cache = (now, datetime.today().year % 100)
+    return _today_cache[1]
+
+# 월별 일수 (2월은 평년 기준, 윤년은 _valid_ymd에서 보정)
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+def _valid_ymd(y: int, m: int, d: int) -> bool:
+    """실재하는 날짜인지 (datetime 생성/예외 없이 정수 비교만)"""
+    if not 1 <= m <= 12 or d < 1:
+        return False
+    if m == 2 and d == 29:
+        return y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+    return d <= _DAYS_IN_MONTH[m - 1]
 
 # 생년월일 6자리(yyMMdd)
 def is_valid_date6(s: str) -> bool:
     d = _digits(s)
     if len(d) != 6:
         return False
-    try:
-        y = int(d[:2])
-        m = int(d[2:4])
-        dd = int(d[4:6])
-        # 00~현재 연도의 뒤 2자리까지 허용 → 세기 보정
-        this_year = int(datetime.today().strftime("%y"))
-        full_year = 1900 + y if y > this_year else 2000 + y
-        datetime(full_year, m, dd)
-        return True
-    except ValueError:
-        return False
+    y = int(d[:2])
+    m = int(d[2:4])
+    dd = int(d[4:6])
+    # 00~현재 연도의 뒤 2자리까지 허용 → 세기 보정
+    this_year = _this_year2()
+    full_year = 1900 + y if y > this_year else 2000 + y
+    return _valid_ymd(full_year, m, dd)
+
+# 주민/외국인등록번호 체크섬 가중치 (앞 12자리)
+_RRN_WEIGHTS = (2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5)
+
+_RRN_ASCII_BIAS = 48 * sum(_RRN_WEIGHTS)  # 바이트 값('0'=48) 가중합에서 뺄 몫
+
+def _weighted_sum(d: str) -> int:
+    """13자리 d의 앞 12자리 가중합 (주민/외국인등록번호 체크섬 공용)"""
+    if d.isascii():
+        # ASCII 숫자(대부분): 펼친 바이트 산술 (zip/제너레이터/int() 없음)
+        b = d.encode()
+        return (b[0] * 2 + b[1] * 3 + b[2] * 4 + b[3] * 5 + b[4] * 6 + b[5] * 7
+                + b[6] * 8 + b[7] * 9 + b[8] * 2 + b[9] * 3 + b[10] * 4 + b[11] * 5) - _RRN_ASCII_BIAS
+    return sum(int(x) * w for x, w in zip(d, _RRN_WEIGHTS))
 
 # 주민등록번호(날짜+체크섬)
 def is_valid_rrn_checksum(s: str) -> bool:
     d = _digits(s)
     if len(d) != 13:
         return False
-    weights = [2,3,4,5,6,7,8,9,2,3,4,5]
-    total = sum(int(x)*w for x, w in zip(d[:-1], weights))
+    total = _weighted_sum(d)
     chk = (11 - (total % 11)) % 10
     return chk == int(d[-1])
 
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_rrn(s: str) -> bool:
+    if not s or len(s) < 13:  # 13자리 미만 입력은 숫자 추출 없이 거절
+        return False
     d = _digits(s)
     if len(d) != 13:
         return False
@@ -92,12 +168,14 @@ def is_valid_fgn_checksum(s: str) -> bool:
     d = _digits(s)
     if len(d) != 13:
         return False
-    weights = [2,3,4,5,6,7,8,9,2,3,4,5]
-    total = sum(int(x)*w for x, w in zip(d[:-1], weights))
+    total = _weighted_sum(d)
     chk = (11 - (total % 11) + 2) % 10
     return chk == int(d[-1])
 
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def is_valid_fgn(s: str) -> bool:
+    if not s or len(s) < 13:  # 13자리 미만 입력은 숫자 추출 없이 거절
+        return False
     d = _digits(s)
     if len(d) != 13:
         return False
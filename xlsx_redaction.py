@@ -1,24 +1,22 @@
 # xlsx_redaction.py
 import os
 import re
-import zipfile
-import shutil
 import logging
-import xml.etree.ElementTree as ET
+from lxml import etree as LET
 
-# RULES는 redac_rules.py의 것 사용 (패키지/스크립트 양쪽 지원)
+# 공통 매칭 엔진 (패키지/스크립트 양쪽 지원)
 try:
-    from .redac_rules import RULES
+    from .redac_core import (
+        get_logger, iter_batch_matches, mask_nodes, mask_table,
+        merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 except ImportError:
-    from redac_rules import RULES
+    from redac_core import (
+        get_logger, iter_batch_matches, mask_nodes, mask_table,
+        merge_overlaps, part_may_match, part_pool, rewrite_zip,
+    )
 
-logger = logging.getLogger("xlsx_redaction")
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
-    logger.addHandler(ch)
+logger = get_logger("xlsx_redaction")
 
 # Excel main namespace
 NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
@@ -26,90 +24,59 @@ NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
 # -----------------------------
 # 공통 유틸
 # -----------------------------
-def _merge_overlaps(spans):
-    """겹치는 (s,e) 구간 병합"""
-    if not spans:
-        return []
-    spans = sorted(spans)
-    merged = [spans[0]]
-    for s, e in spans[1:]:
-        ps, pe = merged[-1]
-        if s <= pe:
-            merged[-1] = (ps, max(pe, e))
-        else:
-            merged.append((s, e))
-    return merged
+def _is_kept(ch: str) -> bool:
+    """마스킹하지 않고 보존할 문자: 하이픈('-')"""
+    return ch == "-"
 
-def _apply_replacements_to_nodes(nodes, spans, mask="*"):
+def _apply_replacements_to_nodes(nodes, spans, table):
     """
     nodes: [[node, text], ...]   # node.text 를 가진 텍스트 노드들의 리스트
     spans: [(start, end)]        # 결합 문자열 기준 (start 포함, end 제외)
+    table: mask_table(mask_char, _is_kept)  # 호출자가 파트당 1회 구성
     정책:
       - 매칭된 길이만큼 마스킹하되, 하이픈('-')은 그대로 보존
       - 전체 길이는 유지 → 오프셋 보정 불필요
     """
-    mask_char = (mask or "*")[0]
-
-    # 전역 오프셋
-    offsets = []
-    acc = 0
-    for _node, txt in nodes:
-        offsets.append((acc, acc + len(txt)))
-        acc += len(txt)
-
-    # 각 span을 노드 조각 단위로 치환
-    for s, e in spans:
-        i = 0
-        while i < len(nodes) and e > s:
-            node, txt = nodes[i]
-            ns, ne = offsets[i]
-            if ne <= s:
-                i += 1
-                continue
-            if ns >= e:
-                break
-
-            ls = max(ns, s) - ns
-            le = max(0, min(ne, e) - ns)
-            if ls < le:
-                piece = txt[ls:le]
-                masked = "".join(ch if ch == "-" else mask_char for ch in piece)
-                nodes[i][1] = txt[:ls] + masked + txt[le:]
-            i += 1
+    mask_nodes(nodes, spans, table)
 
     # 반영
     for node, new_text in nodes:
         node.text = new_text
 
-def _find_matches(text: str):
-    """RULES로 search + validator → [(pname, (s,e), matched), ...]"""
-    matches = []
-    for pname, rule in RULES.items():
-        comp = rule["regex"]
-        validator = rule["validator"]
-        for m in comp.finditer(text):
-            val = m.group(0)
-            ok = False
-            try:
-                ok = bool(validator(val))
-            except Exception as e:
-                logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
-                ok = False
-            if ok:
-                matches.append((pname, (m.start(), m.end()), val))
-                logger.debug("[MATCH] pattern=%s text='%s' span=%s", pname, val, (m.start(), m.end()))
-    return matches
+def _validate(pname, validator, val) -> bool:
+    """validator 호출 (예외는 불일치로 간주)"""
+    try:
+        return bool(validator(val))
+    except Exception as e:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[VALIDATOR ERROR] %s value='%s' err=%s", pname, val, e)
+        return False
 
-def _rezip_dir(src_dir: str, out_path: str):
-    """src_dir의 '내용'을 ZIP 루트에 그대로 담아 XLSX로 재압축"""
-    if os.path.exists(out_path):
-        os.remove(out_path)
-    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for root, _dirs, files in os.walk(src_dir):
-            for fname in files:
-                abs_path = os.path.join(root, fname)
-                arc = os.path.relpath(abs_path, src_dir).replace(os.sep, "/")
-                z.write(abs_path, arc)
+def _find_matches_batch(texts):
+    """texts 각각의 통과 구간 리스트 [[(s, e), ...], ...] (전체를 한 번에 스캔)"""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    out = [[] for _ in texts]
+    for i, pname, validator, s, e, val in iter_batch_matches(texts):
+        if _validate(pname, validator, val):
+            out[i].append((s, e))
+            if debug:
+                logger.debug("[MATCH] pattern=%s text='%s' span=%s", pname, val, (s, e))
+    return out
+
+def _redact_node_groups(groups, table) -> int:
+    """
+    groups: [nodes, ...]  # 셀/문자열 단위 [[node, text], ...] 묶음
+    모든 묶음을 한 번에 스캔 → 묶음별 병합/마스킹 → 마스킹한 구간 수
+    """
+    texts = ["".join(txt for _, txt in nodes) for nodes in groups]
+    total_spans = 0
+    for nodes, found in zip(groups, _find_matches_batch(texts)):
+        if not found:
+            continue
+        spans = merge_overlaps(found)
+        _apply_replacements_to_nodes(nodes, spans, table)
+        total_spans += len(spans)
+    return total_spans
 
 # -----------------------------
 # 엑셀(XML) 텍스트 수집 유틸
@@ -161,104 +128,103 @@ def _collect_nodes_inline_str(cell):
 # -----------------------------
 # 처리기: sharedStrings.xml
 # -----------------------------
-def _process_shared_strings(tmp_dir: str, mask="*") -> int:
-    sst_path = os.path.join(tmp_dir, "xl", "sharedStrings.xml")
-    if not os.path.exists(sst_path):
-        return 0
-
-    tree = ET.parse(sst_path)
-    root = tree.getroot()
-    changed = False
-    total_spans = 0
-
+def _redact_shared_strings(root, table) -> int:
+    """sharedStrings 루트의 모든 <si> 마스킹 → 마스킹한 구간 수"""
+    groups = []
     for si in root.findall("./s:si", NS):
         nodes = _collect_nodes_shared_string(si)
-        if not nodes:
-            continue
-        joined = "".join(txt for _, txt in nodes)
-        found = _find_matches(joined)
-        if not found:
-            continue
-
-        spans = _merge_overlaps([span for _pn, span, _v in found])
-        _apply_replacements_to_nodes(nodes, spans, mask=mask)
-        changed = True
-        total_spans += len(spans)
-
-    if changed:
-        tree.write(sst_path, encoding="utf-8", xml_declaration=True)
-        logger.info("[sharedStrings] redacted groups: %d", total_spans)
-    return total_spans
+        if nodes:
+            groups.append(nodes)
+    return _redact_node_groups(groups, table)
 
 # -----------------------------
 # 처리기: 각 워크시트 (inlineStr)
 # -----------------------------
-def _process_sheets_inline(tmp_dir: str, mask="*") -> int:
+def _redact_sheet_inline(root, table) -> int:
     """
-    xl/worksheets/sheet*.xml 내부의 inlineStr 텍스트 마스킹
+    시트 루트의 inlineStr 텍스트 마스킹 → 마스킹한 구간 수
     (sharedStrings 인덱스를 참조하는 셀(t="s")은 sharedStrings 처리가 담당)
     """
-    ws_dir = os.path.join(tmp_dir, "xl", "worksheets")
-    if not os.path.isdir(ws_dir):
-        return 0
-
-    total_spans = 0
-    for fname in sorted(os.listdir(ws_dir)):
-        if not fname.startswith("sheet") or not fname.endswith(".xml"):
+    groups = []
+    for c in root.findall(".//s:c", NS):
+        if c.get("t") != "inlineStr":
             continue
-        fpath = os.path.join(ws_dir, fname)
-        tree = ET.parse(fpath)
-        root = tree.getroot()
-        changed = False
-
-        for c in root.findall(".//s:c", NS):
-            if c.get("t") != "inlineStr":
-                continue
-            nodes = _collect_nodes_inline_str(c)
-            if not nodes:
-                continue
-
-            joined = "".join(txt for _, txt in nodes)
-            found = _find_matches(joined)
-            if not found:
-                continue
-
-            spans = _merge_overlaps([span for _pn, span, _v in found])
-            _apply_replacements_to_nodes(nodes, spans, mask=mask)
-            changed = True
-            total_spans += len(spans)
-
-        if changed:
-            tree.write(fpath, encoding="utf-8", xml_declaration=True)
-            logger.info("[sheet] %s redacted", fname)
+        nodes = _collect_nodes_inline_str(c)
+        if nodes:
+            groups.append(nodes)
+    return _redact_node_groups(groups, table)
+
+SST_PART = "xl/sharedStrings.xml"
+SHEET_DIR = "xl/worksheets/"
+
+# 바이트 사전 검사: <t> 요소(접두어 무관)가 없는 파트는 파싱하지 않음.
+# 시트는 inlineStr 셀만 처리하므로 그 표식도 있어야 함 (대부분 sharedStrings 참조뿐)
+_T_BYTES_RE = re.compile(rb"<(?:[^\s<>/!?:]+:)?t[\s/>]")
+_INLINE_BYTES_RE = re.compile(rb"inlineStr")
+
+def _select_xlsx_parts(names):
+    """처리 대상 XML: xl/sharedStrings.xml, xl/worksheets/sheet*.xml"""
+    for name in names:
+        if name == SST_PART:
+            yield name
+        elif name.startswith(SHEET_DIR):
+            fname = name[len(SHEET_DIR):]
+            if "/" not in fname and fname.startswith("sheet") and fname.endswith(".xml"):
+                yield name
+
+def _has_text(name: str, data: bytes) -> bool:
+    """풀/파서로 보내기 전 바이트 사전 검사 (False면 처리할 텍스트가 없는 파트)"""
+    if not part_may_match(data, _T_BYTES_RE):
+        return False
+    return name == SST_PART or part_may_match(data, _INLINE_BYTES_RE)
 
-    return total_spans
+def _process_one_xml(name: str, data: bytes, mask_char="*"):
+    """
+    XML 파트 하나 파싱 → 마스킹 → 직렬화 (rewrite_zip 워커)
+    반환: (name, 변경된 XML bytes 또는 None, 구간 수)
+    """
+    table = mask_table(mask_char, _is_kept)  # 파트당 1회
+    parser = LET.XMLParser(remove_blank_text=False, resolve_entities=False, strip_cdata=False)
+    root = LET.fromstring(data, parser=parser)
+    if name == SST_PART:
+        spans = _redact_shared_strings(root, table)
+    else:
+        spans = _redact_sheet_inline(root, table)
+    if not spans:
+        return name, None, 0
+    # 원본 선언의 standalone="yes" 유지 (lxml은 생략과 "no"를 구분하지 않으므로 그 외는 생략 = 기본값 no)
+    standalone = True if root.getroottree().docinfo.standalone else None
+    xml_bytes = LET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=standalone, pretty_print=False)
+    return name, xml_bytes, spans
 
 # -----------------------------
 # 공개 함수
 # -----------------------------
-def redact_xlsx(input_xlsx: str, output_xlsx: str, mask="*"):
+def redact_xlsx(input_xlsx: str, output_xlsx: str, mask="*", executor=None):
     """
     .xlsx 레닥션:
       - sharedStrings.xml의 모든 문자열
       - 각 시트의 inlineStr 문자열
     에 대해 RULES 기반 탐지 → 길이 유지 마스킹(하이픈 '-' 보존)
+    executor: 배치 실행당 1회 만든 part_pool() (큰 문서만 파트를 풀로 분산)
     """
-    tmp_dir = "xlsx_tmp"
-    if os.path.exists(tmp_dir):
-        shutil.rmtree(tmp_dir)
-    os.makedirs(tmp_dir)
-
-    with zipfile.ZipFile(input_xlsx, "r") as z:
-        z.extractall(tmp_dir)
+    mask_char = (mask or "*")[0]  # 문서당 1회 계산해 워커로 전달
+    # 압축 해제 없이 대상 파트만 처리하며 ZIP을 다시 씀 (출력 == 입력이어도 됨)
+    results = rewrite_zip(
+        input_xlsx, output_xlsx, _select_xlsx_parts, _process_one_xml, mask_char,
+        precheck=_has_text, executor=executor,
+    )
 
     total = 0
-    total += _process_shared_strings(tmp_dir, mask=mask)
-    total += _process_sheets_inline(tmp_dir, mask=mask)
+    for name, data, spans in results:
+        if data is None:
+            continue
+        total += spans
+        if name == SST_PART:
+            logger.info("[sharedStrings] redacted groups: %d", spans)
+        else:
+            logger.info("[sheet] %s redacted", name[len(SHEET_DIR):])
     logger.info("Total redacted groups: %d", total)
-
-    _rezip_dir(tmp_dir, output_xlsx)
-    shutil.rmtree(tmp_dir, ignore_errors=True)
     logger.info("[DONE] Saved: %s", output_xlsx)
 
 # -----------------------------
@@ -270,9 +236,7 @@ def _is_candidate(fname: str) -> bool:
     if fname.startswith("~$"):  # Excel 임시파일 제외
         return False
     base, _ = os.path.splitext(fname)
-    if base.lower().endswith("_redacted"):
-        return False
-    return os.path.isfile(fname)
+    return not base.lower().endswith("_redacted")
 
 if __name__ == "__main__":
     import sys
@@ -281,18 +245,22 @@ if __name__ == "__main__":
         # 단일 파일 모드
         src = args[0]
         dst = args[1] if len(args) >= 2 else "output_redacted.xlsx"
-        redact_xlsx(src, dst, mask="*")
+        with part_pool() as pool:
+            redact_xlsx(src, dst, mask="*", executor=pool)
     else:
         # 배치 모드: 현재 폴더의 모든 .xlsx 처리
-        files = [f for f in os.listdir(".") if _is_candidate(f)]
+        # scandir: DirEntry.is_file()은 디렉터리 조회 결과를 재사용 (항목별 stat 없음)
+        with os.scandir(".") as it:
+            files = [e.name for e in it if e.is_file() and _is_candidate(e.name)]
         if not files:
             print("현재 폴더에 처리할 XLSX가 없습니다.")
             raise SystemExit(0)
-        for f in files:
-            base, ext = os.path.splitext(f)
-            out = f"{base}_redacted{ext}"
-            try:
-                print(f"[XLSX] {f} → {out}")
-                redact_xlsx(f, out, mask="*")
-            except Exception as e:
-                print(f"[ERROR] {f}: {e}")
+        with part_pool() as pool:  # 풀은 실행 전체에서 하나만
+            for f in files:
+                base, ext = os.path.splitext(f)
+                out = f"{base}_redacted{ext}"
+                try:
+                    print(f"[XLSX] {f} → {out}")
+                    redact_xlsx(f, out, mask="*", executor=pool)
+                except Exception as e:
+                    print(f"[ERROR] {f}: {e}")